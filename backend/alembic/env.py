@@ -20,6 +20,10 @@ fileConfig(config.config_file_name)
 from app.models import Base
 target_metadata = Base.metadata
 
+# Use the same DATABASE_URL as the application instead of the one in alembic.ini
+from app.settings import settings
+config.set_main_option("sqlalchemy.url", settings.database_url.replace("%", "%%"))
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
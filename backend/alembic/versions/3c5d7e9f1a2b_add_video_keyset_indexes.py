@@ -0,0 +1,29 @@
+"""add_video_keyset_indexes
+
+Revision ID: 3c5d7e9f1a2b
+Revises: 824692065fd9
+Create Date: 2026-10-17 10:12:31.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c5d7e9f1a2b'
+down_revision = '824692065fd9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (sort column, id) indexes for the cursor-paginated video lists
+    op.create_index('ix_video_tutorials_published_date_keyset', 'video_tutorials', ['published_date', 'id'])
+    op.create_index('ix_video_tutorials_title_keyset', 'video_tutorials', ['title', 'id'])
+    op.create_index('ix_video_tutorials_creator_keyset', 'video_tutorials', ['creator', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_video_tutorials_creator_keyset', table_name='video_tutorials')
+    op.drop_index('ix_video_tutorials_title_keyset', table_name='video_tutorials')
+    op.drop_index('ix_video_tutorials_published_date_keyset', table_name='video_tutorials')
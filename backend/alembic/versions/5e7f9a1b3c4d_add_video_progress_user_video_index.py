@@ -0,0 +1,25 @@
+"""add_video_progress_user_video_index
+
+Revision ID: 5e7f9a1b3c4d
+Revises: 3c5d7e9f1a2b
+Create Date: 2026-10-17 11:03:47.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e7f9a1b3c4d'
+down_revision = '3c5d7e9f1a2b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Used by the outer join behind sort_by=last_watched and the per-video progress lookups
+    op.create_index('ix_video_progress_user_id_video_id', 'video_progress', ['user_id', 'video_id'])
+
+
+def downgrade():
+    op.drop_index('ix_video_progress_user_id_video_id', table_name='video_progress')
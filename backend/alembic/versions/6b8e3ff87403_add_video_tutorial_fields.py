@@ -1,7 +1,7 @@
 """Add video tutorial fields
 
 Revision ID: 6b8e3ff87403
-Revises: 
+Revises: 7a4270cf0d2b
 Create Date: 2025-03-26 15:26:45.539164
 
 """
@@ -11,7 +11,7 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision = '6b8e3ff87403'
-down_revision = None
+down_revision = '7a4270cf0d2b'
 branch_labels = None
 depends_on = None
 
@@ -0,0 +1,159 @@
+"""initial schema
+
+Creates the tables that used to be created by Base.metadata.create_all()
+at application startup, in the shape the later migrations expect, so a
+fresh database can be built with `alembic upgrade head` alone.
+
+Databases that were already created by the application are unaffected:
+they are at a later revision, so this one is never applied to them.
+
+Revision ID: 7a4270cf0d2b
+Revises: 
+Create Date: 2026-10-17 10:12:41.205318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4270cf0d2b'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(), nullable=True),
+        sa.Column('username', sa.String(), nullable=True),
+        sa.Column('hashed_password', sa.String(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+
+    op.create_table(
+        'game_sessions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.DateTime(), nullable=True),
+        sa.Column('player_character', sa.String(), nullable=True),
+        sa.Column('enemy_character', sa.String(), nullable=True),
+        sa.Column('result', sa.String(), nullable=True),
+        sa.Column('mood_rating', sa.Integer(), nullable=True),
+        sa.Column('goals', sa.JSON(), nullable=True),  # dropped by da3a0be767fb
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_game_sessions_id'), 'game_sessions', ['id'], unique=False)
+    op.create_index(op.f('ix_game_sessions_player_character'), 'game_sessions', ['player_character'], unique=False)
+    op.create_index(op.f('ix_game_sessions_enemy_character'), 'game_sessions', ['enemy_character'], unique=False)
+
+    op.create_table(
+        'video_categories',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_video_categories_id'), 'video_categories', ['id'], unique=False)
+    op.create_index(op.f('ix_video_categories_name'), 'video_categories', ['name'], unique=True)
+
+    op.create_table(
+        'creators',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('website', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_creators_id'), 'creators', ['id'], unique=False)
+    op.create_index(op.f('ix_creators_name'), 'creators', ['name'], unique=True)
+
+    op.create_table(
+        'video_tutorials',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=True),
+        sa.Column('creator', sa.String(), nullable=True),
+        sa.Column('url', sa.String(), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('upload_date', sa.DateTime(), nullable=True),
+        sa.Column('video_type', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_video_tutorials_id'), 'video_tutorials', ['id'], unique=False)
+    op.create_index(op.f('ix_video_tutorials_title'), 'video_tutorials', ['title'], unique=False)
+    op.create_index(op.f('ix_video_tutorials_creator'), 'video_tutorials', ['creator'], unique=False)
+
+    op.create_table(
+        'video_progress',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('is_watched', sa.Boolean(), nullable=True),
+        sa.Column('watch_progress', sa.Float(), nullable=True),
+        sa.Column('personal_notes', sa.Text(), nullable=True),
+        sa.Column('last_watched', sa.DateTime(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('video_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['video_id'], ['video_tutorials.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_video_progress_id'), 'video_progress', ['id'], unique=False)
+
+    op.create_table(
+        'champion_pools',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('category', sa.String(), nullable=False),  # made nullable by 824692065fd9
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_champion_pools_id'), 'champion_pools', ['id'], unique=False)
+
+    op.create_table(
+        'champion_pool_entries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('champion_id', sa.String(), nullable=False),
+        sa.Column('champion_name', sa.String(), nullable=False),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('pool_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['pool_id'], ['champion_pools.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_champion_pool_entries_id'), 'champion_pool_entries', ['id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_champion_pool_entries_id'), table_name='champion_pool_entries')
+    op.drop_table('champion_pool_entries')
+    op.drop_index(op.f('ix_champion_pools_id'), table_name='champion_pools')
+    op.drop_table('champion_pools')
+    op.drop_index(op.f('ix_video_progress_id'), table_name='video_progress')
+    op.drop_table('video_progress')
+    op.drop_index(op.f('ix_video_tutorials_creator'), table_name='video_tutorials')
+    op.drop_index(op.f('ix_video_tutorials_title'), table_name='video_tutorials')
+    op.drop_index(op.f('ix_video_tutorials_id'), table_name='video_tutorials')
+    op.drop_table('video_tutorials')
+    op.drop_index(op.f('ix_creators_name'), table_name='creators')
+    op.drop_index(op.f('ix_creators_id'), table_name='creators')
+    op.drop_table('creators')
+    op.drop_index(op.f('ix_video_categories_name'), table_name='video_categories')
+    op.drop_index(op.f('ix_video_categories_id'), table_name='video_categories')
+    op.drop_table('video_categories')
+    op.drop_index(op.f('ix_game_sessions_enemy_character'), table_name='game_sessions')
+    op.drop_index(op.f('ix_game_sessions_player_character'), table_name='game_sessions')
+    op.drop_index(op.f('ix_game_sessions_id'), table_name='game_sessions')
+    op.drop_table('game_sessions')
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_table('users')
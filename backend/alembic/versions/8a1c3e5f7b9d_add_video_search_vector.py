@@ -0,0 +1,37 @@
+"""add_video_search_vector
+
+Revision ID: 8a1c3e5f7b9d
+Revises: 5e7f9a1b3c4d
+Create Date: 2026-10-17 13:26:09.550371
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '8a1c3e5f7b9d'
+down_revision = '5e7f9a1b3c4d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Full-text search document, kept up to date by Postgres itself
+    op.add_column('video_tutorials', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(key_points, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'C')",
+            persisted=True,
+        ),
+    ))
+    op.create_index('ix_video_tutorials_search_vector', 'video_tutorials', ['search_vector'], postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_video_tutorials_search_vector', table_name='video_tutorials')
+    op.drop_column('video_tutorials', 'search_vector')
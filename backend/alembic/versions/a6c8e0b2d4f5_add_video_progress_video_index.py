@@ -0,0 +1,26 @@
+"""add_video_progress_video_index
+
+Revision ID: a6c8e0b2d4f5
+Revises: f4b6d8a0c2e3
+Create Date: 2026-10-17 23:02:48.116925
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c8e0b2d4f5'
+down_revision = 'f4b6d8a0c2e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The (user_id, video_id) unique index can't serve lookups by video alone, which
+    # deleting a video does (foreign key check, ORM cascade)
+    op.create_index('ix_video_progress_video_id', 'video_progress', ['video_id'])
+
+
+def downgrade():
+    op.drop_index('ix_video_progress_video_id', table_name='video_progress')
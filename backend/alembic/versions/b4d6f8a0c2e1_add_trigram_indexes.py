@@ -0,0 +1,30 @@
+"""add_trigram_indexes
+
+Revision ID: b4d6f8a0c2e1
+Revises: 8a1c3e5f7b9d
+Create Date: 2026-10-17 14:48:52.730914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4d6f8a0c2e1'
+down_revision = '8a1c3e5f7b9d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Trigram indexes serve ILIKE '%x%' filters and fuzzy (similarity) matches
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_video_tutorials_title_trgm', 'video_tutorials', ['title'],
+                    postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'})
+    op.create_index('ix_creators_name_trgm', 'creators', ['name'],
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade():
+    op.drop_index('ix_creators_name_trgm', table_name='creators')
+    op.drop_index('ix_video_tutorials_title_trgm', table_name='video_tutorials')
@@ -0,0 +1,51 @@
+"""convert_video_tags_to_jsonb
+
+Revision ID: c7e9a1b3d5f2
+Revises: b4d6f8a0c2e1
+Create Date: 2026-10-17 16:05:40.281633
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e9a1b3d5f2'
+down_revision = 'b4d6f8a0c2e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.alter_column('video_tutorials', 'tags',
+               existing_type=sa.JSON(),
+               type_=postgresql.JSONB(),
+               postgresql_using='tags::jsonb',
+               existing_nullable=True)
+
+    # Tag filters and the tag cloud expect an array (or NULL). Older rows may hold a JSON
+    # null or a Postgres array literal string such as '{macro,"wave management"}'.
+    op.execute("UPDATE video_tutorials SET tags = NULL WHERE jsonb_typeof(tags) = 'null'")
+    op.execute("""
+        UPDATE video_tutorials SET tags = CASE
+            WHEN tags #>> '{}' LIKE '{%}' THEN (
+                SELECT coalesce(jsonb_agg(btrim(tag, '"''')), '[]'::jsonb)
+                FROM unnest(string_to_array(btrim(tags #>> '{}', '{}'), ',')) AS tag
+            )
+            ELSE jsonb_build_array(tags #>> '{}')
+        END
+        WHERE jsonb_typeof(tags) = 'string'
+    """)
+
+    op.create_index('ix_video_tutorials_tags', 'video_tutorials', ['tags'],
+                    postgresql_using='gin', postgresql_ops={'tags': 'jsonb_path_ops'})
+
+
+def downgrade():
+    op.drop_index('ix_video_tutorials_tags', table_name='video_tutorials')
+    op.alter_column('video_tutorials', 'tags',
+               existing_type=postgresql.JSONB(),
+               type_=sa.JSON(),
+               postgresql_using='tags::json',
+               existing_nullable=True)
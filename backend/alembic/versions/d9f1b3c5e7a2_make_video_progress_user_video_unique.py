@@ -0,0 +1,75 @@
+"""make_video_progress_user_video_unique
+
+Revision ID: d9f1b3c5e7a2
+Revises: c7e9a1b3d5f2
+Create Date: 2026-10-17 18:42:13.507316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9f1b3c5e7a2'
+down_revision = 'c7e9a1b3d5f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Concurrent first saves could create several rows for one user and video. Keep the
+    # most recently watched one, carrying over watched/bookmarked from any of them and
+    # the latest non-empty notes, then delete the rest. Rows missing either id never
+    # conflict and are left alone.
+    op.execute("""
+        WITH ranked AS (
+            SELECT id, user_id, video_id,
+                   row_number() OVER (
+                       PARTITION BY user_id, video_id ORDER BY last_watched DESC NULLS LAST, id DESC
+                   ) AS position
+            FROM video_progress
+            WHERE user_id IS NOT NULL AND video_id IS NOT NULL
+        ),
+        merged AS (
+            SELECT user_id, video_id,
+                   bool_or(coalesce(is_watched, false)) AS is_watched,
+                   bool_or(coalesce(is_bookmarked, false)) AS is_bookmarked,
+                   (array_agg(personal_notes ORDER BY last_watched DESC NULLS LAST, id DESC)
+                       FILTER (WHERE personal_notes IS NOT NULL AND personal_notes <> ''))[1] AS personal_notes
+            FROM video_progress
+            WHERE user_id IS NOT NULL AND video_id IS NOT NULL
+            GROUP BY user_id, video_id
+            HAVING count(*) > 1
+        )
+        UPDATE video_progress
+        SET is_watched = merged.is_watched,
+            is_bookmarked = merged.is_bookmarked,
+            personal_notes = coalesce(merged.personal_notes, video_progress.personal_notes)
+        FROM ranked, merged
+        WHERE ranked.id = video_progress.id AND ranked.position = 1
+          AND merged.user_id = ranked.user_id AND merged.video_id = ranked.video_id
+    """)
+    op.execute("""
+        DELETE FROM video_progress
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY user_id, video_id ORDER BY last_watched DESC NULLS LAST, id DESC
+                ) AS position
+                FROM video_progress
+                WHERE user_id IS NOT NULL AND video_id IS NOT NULL
+            ) AS ranked
+            WHERE position > 1
+        )
+    """)
+
+    # The unique index serves the same lookups as the plain one it replaces, and is
+    # the conflict target of the progress upserts
+    op.drop_index('ix_video_progress_user_id_video_id', table_name='video_progress')
+    op.create_unique_constraint('uq_video_progress_user_id_video_id', 'video_progress', ['user_id', 'video_id'])
+
+
+def downgrade():
+    # Merged duplicates are not restored
+    op.drop_constraint('uq_video_progress_user_id_video_id', 'video_progress', type_='unique')
+    op.create_index('ix_video_progress_user_id_video_id', 'video_progress', ['user_id', 'video_id'])
@@ -0,0 +1,30 @@
+"""make_user_flags_not_null
+
+Revision ID: e2a4c6e8f0b1
+Revises: d9f1b3c5e7a2
+Create Date: 2026-10-17 21:05:37.204118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a4c6e8f0b1'
+down_revision = 'd9f1b3c5e7a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # is_admin was added as nullable without a backfill, and neither flag had a server
+    # default. NULL has always been read as "not set", so it becomes false.
+    op.execute("UPDATE users SET is_admin = false WHERE is_admin IS NULL")
+    op.execute("UPDATE users SET is_active = false WHERE is_active IS NULL")
+    op.alter_column('users', 'is_admin', existing_type=sa.Boolean(), nullable=False, server_default=sa.false())
+    op.alter_column('users', 'is_active', existing_type=sa.Boolean(), nullable=False, server_default=sa.true())
+
+
+def downgrade():
+    op.alter_column('users', 'is_active', existing_type=sa.Boolean(), nullable=True, server_default=None)
+    op.alter_column('users', 'is_admin', existing_type=sa.Boolean(), nullable=True, server_default=None)
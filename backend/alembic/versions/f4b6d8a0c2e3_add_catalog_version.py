@@ -0,0 +1,31 @@
+"""add_catalog_version
+
+Revision ID: f4b6d8a0c2e3
+Revises: e2a4c6e8f0b1
+Create Date: 2026-10-17 22:14:09.530172
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4b6d8a0c2e3'
+down_revision = 'e2a4c6e8f0b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # One row, bumped by every catalog write, so all workers agree on the catalog version
+    op.create_table(
+        'catalog_version',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.execute("INSERT INTO catalog_version (id, version) VALUES (1, 0)")
+
+
+def downgrade():
+    op.drop_table('catalog_version')
@@ -0,0 +1,136 @@
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import time
+
+from starlette.responses import JSONResponse
+
+from .api_prefix import request_path
+from .instrumentation import start_request_stats
+from .settings import settings
+
+logger = logging.getLogger("app.access")
+
+_listener = None
+# Root handlers replaced by the queue, restored by stop_logging()
+_previous_handlers = []
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that leaves all formatting to the listener thread"""
+
+    def prepare(self, record):
+        return record
+
+
+class _Formatter(logging.Formatter):
+    """Formats access records as one JSON object per line, everything else as plain text"""
+
+    def format(self, record):
+        access = getattr(record, "access", None)
+        if access is not None:
+            return json.dumps(access, separators=(",", ":"), default=str)
+        return super().format(record)
+
+
+def configure_logging():
+    """Route all logging through a queue so request handlers never block on log I/O"""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(_Formatter("%(levelname)s:%(name)s:%(message)s"))
+
+    root = logging.getLogger()
+    root.setLevel(settings.log_level)
+    _previous_handlers[:] = root.handlers
+    root.handlers = [_DeferredQueueHandler(log_queue)]
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging():
+    """
+    Put the root logger's previous handlers back, then flush queued records and stop the
+    listener thread. configure_logging() sets the queue up again on the next startup.
+    """
+    global _listener
+    if _listener is not None:
+        logging.getLogger().handlers = list(_previous_handlers)
+        _listener.stop()
+        _listener = None
+
+
+def _redacted_headers(scope) -> dict:
+    headers = {}
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            auth_header = value.decode("latin-1")
+            # Don't log the full auth header for security
+            if auth_header.startswith("Bearer "):
+                auth_header = f"Bearer {auth_header[7:15]}..."
+            headers["authorization"] = auth_header
+        elif name == b"user-agent":
+            headers["user-agent"] = value.decode("latin-1")
+    return headers
+
+
+class AccessLogMiddleware:
+    """
+    Writes one structured access-log record per request, with its duration and
+    the time spent in the database. Successful requests are sampled with
+    ACCESS_LOG_SAMPLE_RATE; errors and slow requests are always logged.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.sample_rate = settings.access_log_sample_rate
+        self.slow_seconds = settings.access_log_slow_ms / 1000
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = start_request_stats()
+        status_code = 500
+        response_started = False
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_started
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            logger.exception(f"Request failed: {scope['method']} {request_path(scope)}")
+            if response_started:
+                raise
+            status_code = 500
+            response = JSONResponse(status_code=500, content={"detail": str(e)})
+            await response(scope, receive, send)
+        finally:
+            for statement, count in stats.repeated_statements():
+                logger.warning(
+                    f"Possible N+1 in {scope['method']} {request_path(scope)}: statement ran {count} times: {statement}"
+                )
+            duration = time.perf_counter() - stats.started
+            if status_code >= 500 or duration >= self.slow_seconds or random.random() < self.sample_rate:
+                logger.info("access", extra={"access": {
+                    "method": scope["method"],
+                    "path": request_path(scope),
+                    "status": status_code,
+                    "duration_ms": round(duration * 1000, 2),
+                    "db_ms": round(stats.db_time * 1000, 2),
+                    "db_statements": stats.db_statements,
+                    "client": scope["client"][0] if scope.get("client") else None,
+                    "headers": _redacted_headers(scope),
+                }})
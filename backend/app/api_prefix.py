@@ -0,0 +1,35 @@
+API_PREFIX = "/api"
+
+
+def api_prefix(scope) -> str:
+    """The prefix the request came in through ("/api" or "")"""
+    return API_PREFIX if scope.get("root_path", "").endswith(API_PREFIX) else ""
+
+
+def request_path(scope) -> str:
+    """Path as the client sent it, including a stripped /api prefix"""
+    return scope.get("root_path", "") + scope["path"]
+
+
+def strip_api_prefix(scope):
+    path = scope["path"]
+    if path == API_PREFIX or path.startswith(API_PREFIX + "/"):
+        scope["root_path"] = scope.get("root_path", "") + API_PREFIX
+        scope["path"] = path[len(API_PREFIX):] or "/"
+
+
+class ApiPrefixMiddleware:
+    """Serves `/api/...` from the same route table as the bare paths.
+
+    The prefix is moved from `path` to `root_path`, the standard ASGI way of mounting
+    an app below a prefix, so routing only ever sees the bare paths while redirects,
+    `request.url` and the docs keep the prefix the client used.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket"):
+            strip_api_prefix(scope)
+        await self.app(scope, receive, send)
@@ -1,14 +1,20 @@
+import asyncio
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from . import models, schemas
-from .database import get_db
+from .database import routed_session_factory
+from .settings import settings
 
 # to get a string like this run:
 # openssl rand -hex 32
@@ -16,28 +22,103 @@ SECRET_KEY = "09d25e094faa6ca2556c818166b7a9563b93f7099f6f0f4caa6cf63b88e8d3e7"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 1440
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min/max rounds pinned to the configured cost so hashes made with any other cost
+# are reported as needing an update and get rehashed on the next login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds,
+    bcrypt__max_rounds=settings.bcrypt_rounds,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# bcrypt takes 100ms+ per call, so it runs on its own small thread pool instead of
+# the event loop. Jobs beyond the workers wait in the pool's queue; once
+# PASSWORD_HASH_MAX_QUEUE are waiting new ones are rejected rather than piling up.
+# The pool is started with the app and shut down with it (see main.py lifespan).
+_hash_executor: Optional[ThreadPoolExecutor] = None
+password_hash_stats = {"pending": 0, "completed": 0, "rejected": 0}
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
 
+def _password_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    # Also started on demand, for code that hashes without running the app
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(
+            max_workers=settings.password_hash_workers, thread_name_prefix="bcrypt"
+        )
+    return _hash_executor
+
+
+async def _run_password_job(func, *args):
+    queue_depth = password_hash_stats["pending"] - settings.password_hash_workers
+    if queue_depth >= settings.password_hash_max_queue:
+        password_hash_stats["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, please retry",
+            headers={"Retry-After": "1"},
+        )
+    password_hash_stats["pending"] += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_password_executor(), func, *args)
+    finally:
+        password_hash_stats["pending"] -= 1
+        password_hash_stats["completed"] += 1
+
+
+def get_password_hash_stats() -> dict:
+    pending = password_hash_stats["pending"]
+    return {
+        **password_hash_stats,
+        "workers": settings.password_hash_workers,
+        "queue_depth": max(0, pending - settings.password_hash_workers),
+    }
+
+
+async def verify_password(plain_password, hashed_password):
+    return await _run_password_job(pwd_context.verify, plain_password, hashed_password)
+
+
+async def verify_and_update_password(plain_password, hashed_password):
+    """Verify a password; also returns a new hash if the stored one uses an outdated cost"""
+    return await _run_password_job(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+async def get_password_hash(password):
+    return await _run_password_job(pwd_context.hash, password)
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
 
+def warm_up_password_hashing():
+    """Start the hashing threads and load the bcrypt backend now instead of on the first login"""
+    _password_executor()
+    pwd_context.dummy_verify()
 
-def get_user(db: Session, username: str):
-    return db.query(models.User).filter(models.User.username == username).first()
 
+def shutdown_password_hashing():
+    """Stop the hashing threads; the next startup (or hash) starts new ones"""
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = get_user(db, username)
+
+async def get_user(db: AsyncSession, username: str):
+    return await db.scalar(select(models.User).where(models.User.username == username))
+
+
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = await get_user(db, username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    verified, new_hash = await verify_and_update_password(password, user.hashed_password)
+    if not verified:
         return False
+    if new_hash:
+        # Stored with a different bcrypt cost than configured, upgrade it transparently
+        user.hashed_password = new_hash
+        await db.commit()
     return user
 
 
@@ -52,7 +133,69 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+# Cache of validated tokens -> snapshot of their user, so authenticated requests
+# skip jwt.decode and the users lookup. Entries expire after AUTH_CACHE_TTL_SECONDS
+# or when the token does, whichever is first, and are dropped whenever the user
+# row is updated in this process. Other workers pick changes up within the TTL.
+_user_cache: "OrderedDict[str, Tuple[float, schemas.User]]" = OrderedDict()
+user_cache_stats = {"hits": 0, "misses": 0}
+
+
+def _cache_user(token: str, user: schemas.User, token_expires_at: Optional[float]):
+    expires_at = time.time() + settings.auth_cache_ttl_seconds
+    if token_expires_at is not None:
+        expires_at = min(expires_at, token_expires_at)
+    _user_cache[token] = (expires_at, user)
+    _user_cache.move_to_end(token)
+    while len(_user_cache) > settings.auth_cache_max_entries:
+        _user_cache.popitem(last=False)
+
+
+def _get_cached_user(token: str) -> Optional[schemas.User]:
+    entry = _user_cache.get(token)
+    if entry is None:
+        return None
+    expires_at, user = entry
+    if expires_at <= time.time():
+        _user_cache.pop(token, None)
+        return None
+    _user_cache.move_to_end(token)
+    return user
+
+
+def invalidate_cached_user(user_id: int):
+    """Drop every cached token of a user, e.g. after a profile, status or admin change"""
+    for token in [token for token, (_, user) in _user_cache.items() if user.id == user_id]:
+        _user_cache.pop(token, None)
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_on_user_change(mapper, connection, target):
+    invalidate_cached_user(target.id)
+
+
+def get_user_cache_stats() -> dict:
+    lookups = user_cache_stats["hits"] + user_cache_stats["misses"]
+    return {
+        **user_cache_stats,
+        "size": len(_user_cache),
+        "hit_ratio": user_cache_stats["hits"] / lookups if lookups else 0.0,
+    }
+
+
+async def get_current_user(request: Request, token: str = Depends(oauth2_scheme)):
+    """
+    Resolve the bearer token to a (cached) snapshot of the user. On a cache miss the user
+    is read in a short session of its own, so authenticating doesn't count as a write
+    for replica routing and no connection is held for the rest of the request.
+    """
+    cached_user = _get_cached_user(token)
+    if cached_user is not None:
+        user_cache_stats["hits"] += 1
+        return cached_user
+    user_cache_stats["misses"] += 1
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -66,19 +209,22 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         token_data = schemas.TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    user = get_user(db, username=token_data.username)
+    async with routed_session_factory(request)() as db:
+        user = await get_user(db, username=token_data.username)
     if user is None:
         raise credentials_exception
-    return user
+    snapshot = schemas.User.model_validate(user)
+    _cache_user(token, snapshot, payload.get("exp"))
+    return snapshot
 
 
-async def get_current_active_user(current_user: models.User = Depends(get_current_user)):
+async def get_current_active_user(current_user: schemas.User = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
 
-async def get_current_admin_user(current_user: models.User = Depends(get_current_active_user)):
+async def get_current_admin_user(current_user: schemas.User = Depends(get_current_active_user)):
     """Check if the current user is an admin"""
     if not current_user.is_admin:
         raise HTTPException(
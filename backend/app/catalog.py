@@ -0,0 +1,172 @@
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy import event, func, select, true, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import auth, models, schemas
+from .database import AsyncSessionLocal, get_routed_db
+from .settings import settings
+
+# Version of the video catalog (videos, categories, creators) for conditional GETs and
+# the caches built from the catalog. It is the catalog_version row, which every catalog
+# write bumps in the same transaction as the write, so all workers agree on it and a
+# committed write is never left out. Read through a request's own session it is never ahead of the data
+# that session sees, also on a replica that lags behind.
+_catalog_version = {"version": 0, "read_at": None}
+
+# Videos written by each version bumped in this process (None when it isn't known
+# which), so the catalog snapshot can reload just those (see catalog_snapshot.py)
+_local_changes: Dict[int, Optional[Set[int]]] = {}
+# Versions remembered; the snapshot reloads everything when it falls further behind
+MAX_TRACKED_CHANGES = 1000
+
+# Query parameters that make a list response depend on the user's own progress,
+# which is not part of the catalog version
+PROGRESS_PARAMS = {"watched", "bookmarked"}
+
+
+async def bump_catalog_version(db: AsyncSession, video_ids: Optional[Iterable[int]] = None):
+    """
+    Call right before committing any change to videos, categories or creators, with the
+    ids of the videos written (empty if only categories or creators changed), so the
+    bump is committed or rolled back with the change. Leave video_ids out for bulk
+    changes whose videos aren't known. New videos need a flush first for their ids.
+    """
+    # The change is flushed first, so the version row (which serializes catalog
+    # writes) is locked only from here to the commit
+    await db.flush()
+    version = await db.scalar(
+        update(models.CatalogVersion)
+        .where(models.CatalogVersion.id == 1)
+        .values(version=models.CatalogVersion.version + 1)
+        .returning(models.CatalogVersion.version)
+    )
+    db.info.setdefault("catalog_bumps", []).append(
+        (version, None if video_ids is None else set(video_ids))
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _record_committed_bumps(session):
+    for version, video_ids in session.info.pop("catalog_bumps", ()):
+        _local_changes[version] = video_ids
+        if len(_local_changes) > MAX_TRACKED_CHANGES:
+            del _local_changes[next(iter(_local_changes))]
+        _catalog_version["version"] = max(_catalog_version["version"], version)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_bumps(session):
+    session.info.pop("catalog_bumps", None)
+
+
+async def read_catalog_version(db: AsyncSession) -> int:
+    """The catalog version as db sees it"""
+    version = await db.scalar(
+        select(models.CatalogVersion.version).where(models.CatalogVersion.id == 1)
+    ) or 0
+    _catalog_version["version"] = max(_catalog_version["version"], version)
+    return version
+
+
+async def read_versions(db: AsyncSession, user_id: int) -> Tuple[int, tuple]:
+    """
+    The catalog version and the user's progress version as db sees them, in one
+    statement, for caches of data that also depends on the user's progress (facets.py).
+
+    The progress version is the user's row counts and latest last_watched: full
+    progress writes stamp last_watched with the current time, and buffered heartbeats
+    only add rows or mark videos watched, so every write changes it, whichever worker
+    made it.
+    """
+    progress = models.VideoProgress
+    state = select(
+        func.count().label("rows"),
+        func.count().filter(progress.is_watched.is_(True)).label("watched"),
+        func.count().filter(progress.is_bookmarked.is_(True)).label("bookmarked"),
+        func.max(progress.last_watched).label("last_watched"),
+    ).where(progress.user_id == user_id).subquery()
+    row = (await db.execute(
+        select(models.CatalogVersion.version, *state.c)
+        .join(state, true())
+        .where(models.CatalogVersion.id == 1)
+    )).one()
+    version = row[0] or 0
+    _catalog_version["version"] = max(_catalog_version["version"], version)
+    return version, tuple(row[1:])
+
+
+async def refresh_catalog_version() -> int:
+    """
+    The latest catalog version known to this worker, read again from the primary when
+    it was last read more than CATALOG_VERSION_TTL_SECONDS ago
+    """
+    read_at = _catalog_version["read_at"]
+    if read_at is None or time.monotonic() - read_at >= settings.catalog_version_ttl_seconds:
+        async with AsyncSessionLocal() as db:
+            await read_catalog_version(db)
+        _catalog_version["read_at"] = time.monotonic()
+    return _catalog_version["version"]
+
+
+def catalog_changes(since: int, until: int) -> Optional[Set[int]]:
+    """
+    The videos written by the versions after since up to until, or None unless all of
+    them were bumped in this process with known videos
+    """
+    changed = set()
+    for version in range(since + 1, until + 1):
+        video_ids = _local_changes.get(version)
+        if video_ids is None:
+            return None
+        changed.update(video_ids)
+    return changed
+
+
+def catalog_etag(version: int) -> str:
+    return f'"catalog-{version}"'
+
+
+def _is_fresh(request: Request, etag: str) -> bool:
+    """Whether the client's cached copy is current"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+def _depends_on_progress(request: Request) -> bool:
+    params = request.query_params
+    return (
+        "progress" in params.get("expand", "").split(",")
+        or params.get("sort_by") == "last_watched"
+        or any(name in params for name in PROGRESS_PARAMS)
+    )
+
+
+async def catalog_conditional_get(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
+):
+    """
+    Dependency for read-only catalog endpoints: sends an ETag and answers 304 Not
+    Modified when the client's copy is current, after one primary key lookup instead of
+    the endpoint's queries. Responses that include the user's progress are left alone.
+    """
+    if _depends_on_progress(request):
+        return
+    etag = catalog_etag(await read_catalog_version(db))
+    headers = {
+        "ETag": etag,
+        # Authenticated data: only the user's own cache may keep it, and must revalidate
+        "Cache-Control": "private, no-cache",
+    }
+    if _is_fresh(request, etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
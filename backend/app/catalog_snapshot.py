@@ -0,0 +1,424 @@
+import asyncio
+import logging
+import sys
+import time
+from array import array
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from fastapi import Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models, schemas
+from .catalog import catalog_changes, read_catalog_version, refresh_catalog_version
+from .database import AsyncSessionLocal
+from .pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from .settings import settings
+from .video_lists import VIDEO_SORT_COLUMNS, progress_data
+
+logger = logging.getLogger(__name__)
+
+# In-process copy of the catalog (videos, categories, creators) for CATALOG_SNAPSHOT=true.
+# Videos are stored column by column (one list per field, shared strings) with prebuilt
+# indexes by category, creator and tag and prebuilt sort orders, so /videos/ filters,
+# sorts and pages without SQL; only the user's progress is read from the database.
+# It follows the catalog version (catalog.py): writes in this process reload just the
+# videos they touched, anything else (bulk updates, writes in other workers) reloads it
+# all. Rebuilds run in a background task with the CPU-bound part in a thread; requests
+# wait for the first snapshot and for reloads of their own worker's writes, and are
+# otherwise served the previous snapshot until the new one is ready.
+#
+# Titles and creators sort by the database collation, which Python can't reproduce,
+# so those sort orders (and their cursors) are left to SQL.
+
+VIDEO_FIELDS = tuple(schemas.VideoTutorial.model_fields)
+# Repeated values stored once
+INTERNED_FIELDS = {"creator", "video_type", "service", "creator_id"}
+SORT_FIELDS = ("published_date",)
+# Sort orders that only the database gets right
+COLLATED_SORTS = {"title", "creator"}
+
+
+def _has_like_wildcards(text: Optional[str]) -> bool:
+    return text is not None and any(char in text for char in "%_\\")
+
+
+def _store(field: str, value):
+    if field in INTERNED_FIELDS and isinstance(value, str):
+        return sys.intern(value)
+    if field == "tags" and value is not None:
+        return tuple(sys.intern(tag) for tag in value)
+    return value
+
+
+def _columns(rows: List[schemas.VideoTutorial]) -> Dict[str, list]:
+    return {field: [_store(field, getattr(row, field)) for row in rows] for field in VIDEO_FIELDS}
+
+
+class CatalogSnapshot:
+    """One version of the catalog. Never changed once built: a write produces a new one"""
+
+    def __init__(
+        self,
+        version: int,
+        columns: Dict[str, list],
+        categories: Dict[int, schemas.VideoCategory],
+        creators: Dict[int, schemas.Creator],
+    ):
+        self.version = version
+        self.columns = columns
+        self.categories = categories
+        self.creators = creators
+        self._build_indexes()
+
+    def patched(
+        self,
+        version: int,
+        rows: List[schemas.VideoTutorial],
+        changed: Set[int],
+        categories: Dict[int, schemas.VideoCategory],
+        creators: Dict[int, schemas.Creator],
+    ) -> "CatalogSnapshot":
+        """A copy with the reloaded videos replaced or added and the deleted ones dropped"""
+        columns = {field: list(column) for field, column in self.columns.items()}
+        row_of = dict(self.row_of)
+        for row in rows:
+            position = row_of.get(row.id)
+            for field in VIDEO_FIELDS:
+                value = _store(field, getattr(row, field))
+                if position is None:
+                    columns[field].append(value)
+                else:
+                    columns[field][position] = value
+            if position is None:
+                row_of[row.id] = len(columns["id"]) - 1
+
+        deleted = {row_of[video_id] for video_id in changed - {row.id for row in rows} if video_id in row_of}
+        if deleted:
+            columns = {
+                field: [value for position, value in enumerate(column) if position not in deleted]
+                for field, column in columns.items()
+            }
+        return CatalogSnapshot(version, columns, categories, creators)
+
+    def _build_indexes(self):
+        ids = self.columns["id"]
+        self.row_of = {video_id: position for position, video_id in enumerate(ids)}
+
+        by_category, by_creator_id, by_creator, by_tag = (defaultdict(list) for _ in range(4))
+        for position in range(len(ids)):
+            by_category[self.columns["category_id"][position]].append(position)
+            by_creator_id[self.columns["creator_relation_id"][position]].append(position)
+            by_creator[self.columns["creator"][position]].append(position)
+            for tag in set(self.columns["tags"][position] or ()):
+                by_tag[tag].append(position)
+        self.by_category = {key: array("l", positions) for key, positions in by_category.items()}
+        self.by_creator_id = {key: array("l", positions) for key, positions in by_creator_id.items()}
+        self.by_creator = {key: array("l", positions) for key, positions in by_creator.items()}
+        self.by_tag = {key: array("l", positions) for key, positions in by_tag.items()}
+
+        by_id = sorted(range(len(ids)), key=ids.__getitem__)
+        self.orders = {("id", False): array("l", by_id), ("id", True): array("l", reversed(by_id))}
+        for field in SORT_FIELDS:
+            values = self.columns[field]
+            present = sorted((p for p in by_id if values[p] is not None), key=lambda p: (values[p], ids[p]))
+            missing = [p for p in by_id if values[p] is None]
+            self.orders[(field, False)] = array("l", present + missing)
+            self.orders[(field, True)] = array("l", present[::-1] + missing[::-1])
+
+    def footprint(self) -> int:
+        """Approximate bytes held by the columns and indexes (shared objects counted once)"""
+        seen = set()
+        total = 0
+
+        def add(obj):
+            nonlocal total
+            if id(obj) not in seen:
+                seen.add(id(obj))
+                total += sys.getsizeof(obj)
+
+        for column in self.columns.values():
+            add(column)
+            for value in column:
+                add(value)
+                if isinstance(value, tuple):
+                    for item in value:
+                        add(item)
+        for index in (self.by_category, self.by_creator_id, self.by_creator, self.by_tag, self.orders, self.row_of):
+            add(index)
+            for key, value in index.items():
+                add(key)
+                add(value)
+        return total
+
+    def filter_rows(
+        self,
+        creator: Optional[str],
+        category_id: Optional[int],
+        title: Optional[str],
+        tags: List[str],
+        tag_match: str,
+        creator_name: Optional[str],
+    ) -> Optional[Set[int]]:
+        """Row positions matching the /videos/ filters, or None when nothing is filtered"""
+        candidates: Optional[Set[int]] = None
+
+        def narrow(positions):
+            nonlocal candidates
+            candidates = set(positions) if candidates is None else candidates.intersection(positions)
+
+        if creator:
+            narrow(self.by_creator.get(creator, ()))
+        if category_id:
+            narrow(self.by_category.get(category_id, ()))
+        if tags:
+            if tag_match == "any" and len(tags) > 1:
+                narrow(set().union(*(self.by_tag.get(tag, ()) for tag in tags)))
+            else:
+                for tag in tags:
+                    narrow(self.by_tag.get(tag, ()))
+        if creator_name:
+            needle = creator_name.lower()
+            creator_ids = [c.id for c in self.creators.values() if c.name and needle in c.name.lower()]
+            narrow(set().union(*(self.by_creator_id.get(creator_id, ()) for creator_id in creator_ids)))
+        if title:
+            needle = title.lower()
+            titles = self.columns["title"]
+            rows = candidates if candidates is not None else range(len(titles))
+            candidates = {p for p in rows if titles[p] is not None and needle in titles[p].lower()}
+        return candidates
+
+    def item(self, position: int) -> schemas.VideoTutorialWithCategory:
+        fields = {field: self.columns[field][position] for field in VIDEO_FIELDS}
+        if fields["tags"] is not None:
+            fields["tags"] = list(fields["tags"])
+        return schemas.VideoTutorialWithCategory.model_construct(
+            **fields,
+            category=self.categories.get(fields["category_id"]),
+            creator_obj=self.creators.get(fields["creator_relation_id"]),
+            progress_data=None,
+            search_snippet=None,
+        )
+
+
+def _is_after(value, row_id: int, after, descending: bool) -> bool:
+    """Whether a row sorts after the cursor, with the same rules as pagination.apply_keyset"""
+    cursor_value, cursor_id = after
+    id_after = row_id < cursor_id if descending else row_id > cursor_id
+    if cursor_value is None:
+        return value is None and id_after
+    if value is None:
+        return True
+    if value == cursor_value:
+        return id_after
+    return value < cursor_value if descending else value > cursor_value
+
+
+_snapshot: Optional[CatalogSnapshot] = None
+_rebuild: Optional[asyncio.Task] = None
+snapshot_stats = {
+    "rows": 0,
+    "bytes": 0,
+    "rebuilds": {"full": 0, "incremental": 0},
+    "last_rebuild_seconds": {"full": 0.0, "incremental": 0.0},
+}
+
+
+async def current_snapshot() -> CatalogSnapshot:
+    """
+    The catalog snapshot, starting a rebuild when the catalog version has moved on. Only
+    the first build and incremental reloads are waited for; full reloads happen in the
+    background while the previous snapshot is served.
+    """
+    global _rebuild
+    version = await refresh_catalog_version()
+    if _snapshot is not None and _snapshot.version >= version:
+        return _snapshot
+    if _rebuild is None or _rebuild.done():
+        _rebuild = asyncio.create_task(_rebuild_snapshot())
+        _rebuild.add_done_callback(_log_rebuild_failure)
+    if _snapshot is None or catalog_changes(_snapshot.version, version) is not None:
+        # Shielded: a cancelled request doesn't cancel the rebuild others wait for
+        await asyncio.shield(_rebuild)
+    return _snapshot
+
+
+def _log_rebuild_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Could not rebuild the catalog snapshot: {str(task.exception())}")
+
+
+async def _rebuild_snapshot():
+    global _snapshot
+    started = time.perf_counter()
+    previous = _snapshot
+    # Always from the primary: a replica may not have the write that bumped the version yet
+    async with AsyncSessionLocal() as db:
+        # The version first: the videos read after it are at least as new
+        version = await read_catalog_version(db)
+        changed = None if previous is None else catalog_changes(previous.version, version)
+        kind = "full" if changed is None else "incremental"
+        categories = (await db.scalars(select(models.VideoCategory))).all()
+        creators = (await db.scalars(select(models.Creator))).all()
+        query = select(models.VideoTutorial)
+        if kind == "incremental":
+            query = query.where(models.VideoTutorial.id.in_(changed))
+        videos = (await db.scalars(query)).all() if kind == "full" or changed else []
+
+    # Validating the rows and building the indexes takes long enough on a large catalog
+    # to stall every other request if it ran on the event loop
+    snapshot, footprint = await asyncio.to_thread(
+        _build_snapshot, previous, version, changed, videos, categories, creators
+    )
+    _snapshot = snapshot
+
+    elapsed = time.perf_counter() - started
+    snapshot_stats["rows"] = len(snapshot.row_of)
+    snapshot_stats["bytes"] = footprint
+    snapshot_stats["rebuilds"][kind] += 1
+    snapshot_stats["last_rebuild_seconds"][kind] = elapsed
+    logger.info(
+        f"Catalog snapshot {kind} rebuild: {len(videos)} videos loaded, {snapshot_stats['rows']} total, "
+        f"{footprint / 1024:.0f} KiB, {elapsed * 1000:.1f}ms"
+    )
+
+
+def _build_snapshot(previous, version, changed, videos, categories, creators):
+    categories = {c.id: schemas.VideoCategory.model_validate(c) for c in categories}
+    creators = {c.id: schemas.Creator.model_validate(c) for c in creators}
+    rows = [schemas.VideoTutorial.model_validate(video) for video in videos]
+    if changed is None:
+        snapshot = CatalogSnapshot(version, _columns(rows), categories, creators)
+    else:
+        snapshot = previous.patched(version, rows, changed, categories, creators)
+    return snapshot, snapshot.footprint()
+
+
+def can_serve_from_snapshot(
+    title: Optional[str], creator_name: Optional[str], fuzzy: bool, sort_by: Optional[str]
+) -> bool:
+    """
+    Whether /videos/ can be answered from the snapshot. Fuzzy matching (pg_trgm similarity),
+    ILIKE wildcards typed by the user and sorting by title or creator are left to the database.
+    """
+    return (
+        settings.catalog_snapshot
+        and sort_by not in COLLATED_SORTS
+        and not fuzzy
+        and not _has_like_wildcards(title)
+        and not _has_like_wildcards(creator_name)
+    )
+
+
+async def read_snapshot_videos(
+    db: AsyncSession,
+    response: Response,
+    user_id: int,
+    creator: Optional[str],
+    category_id: Optional[int],
+    title: Optional[str],
+    tags: List[str],
+    tag_match: str,
+    creator_name: Optional[str],
+    with_progress: bool,
+    sort_by: str,
+    sort_order: str,
+    skip: int,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> List[schemas.VideoTutorialWithCategory]:
+    """/videos/ from the snapshot: same filters, order, cursors and items as the SQL path"""
+    snapshot = await current_snapshot()
+    if snapshot.version < await refresh_catalog_version():
+        # Served while the new snapshot is built: don't let the client cache it under
+        # the tag of the newer version
+        if "etag" in response.headers:
+            del response.headers["etag"]
+    sort_order = "asc" if sort_order.lower() == "asc" else "desc"
+    descending = sort_order == "desc"
+    candidates = snapshot.filter_rows(creator, category_id, title, tags, tag_match, creator_name)
+    ids = snapshot.columns["id"]
+
+    progress_columns = (
+        models.VideoProgress.id,
+        models.VideoProgress.last_watched,
+        models.VideoProgress.user_id,
+        models.VideoProgress.video_id,
+        models.VideoProgress.is_watched,
+        models.VideoProgress.watch_progress,
+        models.VideoProgress.personal_notes,
+        models.VideoProgress.is_bookmarked,
+    )
+    progress_by_video = None
+    if sort_by == "last_watched":
+        # Sorting needs all of the user's progress rows, a small set next to the catalog
+        rows = await db.execute(select(*progress_columns).where(models.VideoProgress.user_id == user_id))
+        progress_by_video = {row.video_id: row for row in rows}
+        values = [
+            progress_by_video[video_id].last_watched if video_id in progress_by_video else None
+            for video_id in ids
+        ]
+        positions = candidates if candidates is not None else range(len(ids))
+        present = sorted((p for p in positions if values[p] is not None), key=lambda p: (values[p], ids[p]))
+        missing = sorted((p for p in positions if values[p] is None), key=ids.__getitem__)
+        order = present[::-1] + missing[::-1] if descending else present + missing
+        candidates = None
+        sort_column = models.VideoProgress.last_watched
+    else:
+        field = sort_by if sort_by in VIDEO_SORT_COLUMNS else "id"
+        values = snapshot.columns[field]
+        order = snapshot.orders[(field, descending)]
+        sort_column = VIDEO_SORT_COLUMNS.get(sort_by, models.VideoTutorial.id)
+
+    after = decode_cursor(cursor, sort_by, sort_order, sort_column) if cursor else None
+    to_skip = 0 if after is not None else skip
+    page = []
+    for position in order:
+        if candidates is not None and position not in candidates:
+            continue
+        if after is not None and not _is_after(values[position], ids[position], after, descending):
+            continue
+        if to_skip:
+            to_skip -= 1
+            continue
+        page.append(position)
+        if len(page) > limit:
+            break
+
+    if len(page) > limit:
+        page = page[:limit]
+        last = page[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(sort_by, sort_order, values[last], ids[last])
+
+    items = [snapshot.item(position) for position in page]
+    if with_progress:
+        if progress_by_video is None:
+            rows = await db.execute(select(*progress_columns).where(
+                models.VideoProgress.user_id == user_id,
+                models.VideoProgress.video_id.in_([item.id for item in items]),
+            ))
+            progress_by_video = {row.video_id: row for row in rows}
+        for item in items:
+            item.progress_data = progress_data(progress_by_video.get(item.id))
+    return items
+
+
+async def warm_up_catalog_snapshot():
+    if settings.catalog_snapshot:
+        await current_snapshot()
+
+
+async def stop_catalog_snapshot():
+    """Cancel a rebuild still running, called on shutdown"""
+    if _rebuild is not None and not _rebuild.done():
+        _rebuild.cancel()
+        try:
+            await _rebuild
+        except (asyncio.CancelledError, Exception):
+            # Failures are logged by _log_rebuild_failure
+            pass
+
+
+def get_catalog_snapshot_stats() -> dict:
+    return {"enabled": settings.catalog_snapshot, **snapshot_stats}
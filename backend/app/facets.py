@@ -0,0 +1,189 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Hashable, List, Optional
+
+from sqlalchemy import case, distinct, false, func, select, true, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models, schemas
+from .catalog import read_versions
+from .search import video_search_query
+from .video_lists import filter_video_search, join_progress, progress_alias
+
+# Counts for the filter sidebar of the videos page (/videos/facets/): videos per
+# category, creator and tag, and how many the user watched and bookmarked, all for
+# the same filters as /videos/search/. One statement counts every facet with
+# GROUPING SETS, so the videos are filtered once instead of once per facet.
+#
+# Results are cached per worker. The catalog facets only change with the catalog
+# version and are shared between users; the watched/bookmarked counts are cached per
+# user and also keyed by the user's progress version, read from the database together
+# with the catalog version so writes made by other workers are seen too. When the
+# filters themselves include watched or bookmarked, every facet depends on the user.
+
+# Facets computed from the catalog and from the user's progress
+CATALOG_FACETS = ("total", "categories", "creators", "tags")
+PROGRESS_FACETS = ("watched", "bookmarked")
+# Cached filter combinations per kind, least recently used dropped first
+MAX_CACHED_FACETS = 1000
+
+_catalog_facets: "OrderedDict[Hashable, dict]" = OrderedDict()
+_progress_facets: "OrderedDict[Hashable, dict]" = OrderedDict()
+_cached_version = {"version": None}
+
+
+def _get_cached(cache: OrderedDict, key) -> Optional[dict]:
+    entry = cache.get(key)
+    if entry is not None:
+        cache.move_to_end(key)
+    return entry
+
+
+def _cache(cache: OrderedDict, key, entry: dict) -> dict:
+    cache[key] = entry
+    cache.move_to_end(key)
+    while len(cache) > MAX_CACHED_FACETS:
+        cache.popitem(last=False)
+    return entry
+
+
+def _facet_counts(rows) -> List[dict]:
+    """FacetCount dicts from (id, name, count) rows, most videos first"""
+    counts = [{"id": id_, "name": name, "count": count} for id_, name, count in rows]
+    counts.sort(key=lambda facet: (-facet["count"], facet["name"] or ""))
+    return counts
+
+
+async def _count_facets(
+    db: AsyncSession,
+    user_id: int,
+    filters: dict,
+    with_catalog: bool,
+    with_progress: bool,
+) -> dict:
+    """Count the catalog and/or progress facets for the filters in one grouped query"""
+    video = models.VideoTutorial
+    # One row per tag of each video; videos without tags keep a single row with no tag
+    tag = func.jsonb_array_elements_text(
+        case((func.jsonb_typeof(video.tags) == "array", video.tags))
+    ).table_valued("value").alias("tag")
+    # false() rather than a bound False, so the expressions in SELECT and GROUP BY match
+    watched = func.coalesce(progress_alias.is_watched, false())
+    bookmarked = func.coalesce(progress_alias.is_bookmarked, false())
+
+    facets = {}
+    if with_catalog:
+        facets["categories"] = (video.category_id, models.VideoCategory.name)
+        facets["creators"] = (video.creator_relation_id, models.Creator.name)
+        facets["tags"] = (tag.c.value,)
+    if with_progress:
+        facets["watched"] = (watched,)
+        facets["bookmarked"] = (bookmarked,)
+    grouping_sets = [tuple_(*columns) for columns in facets.values()]
+    if with_catalog:
+        # The empty grouping set is the total
+        grouping_sets.append(tuple_())
+
+    # Tags repeat each video once per tag, so the other facets count distinct videos
+    query = select(
+        *(column for columns in facets.values() for column in columns),
+        *(func.grouping(columns[0]) for columns in facets.values()),
+        func.count(distinct(video.id)),
+    ).select_from(video)
+    if with_catalog:
+        query = (
+            query.outerjoin(models.VideoCategory, video.category_id == models.VideoCategory.id)
+            .outerjoin(models.Creator, video.creator_relation_id == models.Creator.id)
+            .outerjoin(tag, true())
+        )
+    if with_progress or filters["watched"] is not None or filters["bookmarked"] is not None:
+        query = join_progress(query, user_id)
+    query = filter_video_search(query, progress_alias, **filters)
+    query = query.group_by(func.grouping_sets(*grouping_sets))
+
+    counts = {name: [] for name in facets}
+    total = 0
+    width = sum(len(columns) for columns in facets.values())
+    for row in await db.execute(query):
+        values, grouped, count = row[:width], row[width:-1], row[-1]
+        # grouping() is 0 for the facet the row belongs to, 1 for the others
+        if all(grouped):
+            total = count
+            continue
+        position = 0
+        for (name, columns), is_other in zip(facets.items(), grouped):
+            if not is_other:
+                counts[name].append((*values[position:position + len(columns)], count))
+            position += len(columns)
+
+    result = {}
+    if with_catalog:
+        result["total"] = total
+        result["categories"] = _facet_counts(counts["categories"])
+        result["creators"] = _facet_counts(counts["creators"])
+        result["tags"] = sorted(
+            ({"tag": value, "count": count} for value, count in counts["tags"] if value is not None),
+            key=lambda facet: (-facet["count"], facet["tag"])
+        )
+    for name in PROGRESS_FACETS if with_progress else ():
+        result[name] = sum(count for value, count in counts[name] if value)
+    return result
+
+
+async def video_facets(
+    db: AsyncSession,
+    user_id: int,
+    q: Optional[str] = None,
+    creator_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    tags: Optional[List[str]] = None,
+    tag_match: str = "all",
+    min_published_date: Optional[datetime] = None,
+    max_published_date: Optional[datetime] = None,
+    watched: Optional[bool] = None,
+    bookmarked: Optional[bool] = None,
+) -> schemas.VideoFacets:
+    """Facet counts for the /videos/search/ filters, from the cache where possible"""
+    # Read through db, so counts are never cached under a version newer than their data
+    version, progress_version = await read_versions(db, user_id)
+    if _cached_version["version"] != version:
+        # Entries of older versions can never be read again
+        _catalog_facets.clear()
+        _progress_facets.clear()
+        _cached_version["version"] = version
+
+    filter_key = (
+        q, creator_id, category_id, tuple(sorted(set(tags or ()))), tag_match,
+        min_published_date, max_published_date, watched, bookmarked,
+    )
+    # Versions are part of the keys so counts taken before a concurrent write are
+    # stored under a key no later request asks for
+    progress_key = (version, user_id, progress_version, filter_key)
+    catalog_key = progress_key if watched is not None or bookmarked is not None else (version, filter_key)
+
+    catalog_facets = _get_cached(_catalog_facets, catalog_key)
+    progress_facets = _get_cached(_progress_facets, progress_key)
+    if catalog_facets is None or progress_facets is None:
+        filters = {
+            "ts_query": video_search_query(q) if q else None,
+            "creator_id": creator_id,
+            "category_id": category_id,
+            "tags": tags,
+            "tag_match": tag_match,
+            "min_published_date": min_published_date,
+            "max_published_date": max_published_date,
+            "watched": watched,
+            "bookmarked": bookmarked,
+        }
+        counted = await _count_facets(
+            db, user_id, filters, catalog_facets is None, progress_facets is None
+        )
+        if catalog_facets is None:
+            catalog_facets = _cache(
+                _catalog_facets, catalog_key, {name: counted[name] for name in CATALOG_FACETS}
+            )
+        if progress_facets is None:
+            progress_facets = _cache(
+                _progress_facets, progress_key, {name: counted[name] for name in PROGRESS_FACETS}
+            )
+    return schemas.VideoFacets(**catalog_facets, **progress_facets)
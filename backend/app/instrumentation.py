@@ -0,0 +1,92 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .settings import settings
+
+
+# Per-request statistics, filled in by SQLAlchemy engine events
+class RequestStats:
+    __slots__ = ("started", "db_time", "db_statements", "statement_counts")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.db_statements = 0
+        # SQL text -> executions, only kept when N+1 detection is enabled
+        self.statement_counts: Optional[Dict[str, int]] = {} if settings.db_repeated_statement_warn else None
+
+    def repeated_statements(self) -> List[Tuple[str, int]]:
+        """Statements executed at least DB_REPEATED_STATEMENT_WARN times, most frequent first"""
+        if not self.statement_counts:
+            return []
+        threshold = settings.db_repeated_statement_warn
+        repeated = [(statement, count) for statement, count in self.statement_counts.items() if count >= threshold]
+        return sorted(repeated, key=lambda item: item[1], reverse=True)
+
+
+# The stats object for the request being handled, if any. Listeners mutate the
+# object instead of setting the variable, so updates made inside SQLAlchemy's
+# greenlets and threadpool workers are seen by the middleware.
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+def start_request_stats() -> RequestStats:
+    """Begin collecting statistics for the current request"""
+    stats = RequestStats()
+    current_request_stats.set(stats)
+    return stats
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.db_time += time.perf_counter() - context._query_started
+        stats.db_statements += 1
+        if stats.statement_counts is not None:
+            stats.statement_counts[statement] = stats.statement_counts.get(statement, 0) + 1
+
+
+def instrument_engine(engine: Engine):
+    """Attach statement timing listeners to a (sync) engine"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class StatementLog:
+    """SQL statements captured by capture_statements()"""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@contextmanager
+def capture_statements(*engines: Engine):
+    """
+    Record every statement executed on the given (sync) engines while the block
+    runs, from any thread or task. Meant for tests, where requests run one at a time.
+    """
+    log = StatementLog()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        log.statements.append(statement)
+
+    for engine in engines:
+        event.listen(engine, "after_cursor_execute", record)
+    try:
+        yield log
+    finally:
+        for engine in engines:
+            event.remove(engine, "after_cursor_execute", record)
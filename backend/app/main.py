@@ -1,27 +1,69 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Request
+from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import PlainTextResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from contextlib import asynccontextmanager
 from datetime import timedelta
 import uvicorn
 import logging
-import traceback
-import json
 
-from . import models, schemas
-from .database import engine, SessionLocal, get_db
-from .auth import authenticate_user, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from . import schemas
+from .access_log import AccessLogMiddleware, configure_logging, stop_logging
+from .api_prefix import ApiPrefixMiddleware
+from .pagination import NEXT_CURSOR_HEADER
+from .metrics import MetricsMiddleware, render_metrics
+from .database import get_routed_db, get_pool_status, warm_up_pools, dispose_engines
+from .catalog_snapshot import get_catalog_snapshot_stats, stop_catalog_snapshot, warm_up_catalog_snapshot
+from .progress_buffer import get_progress_buffer_stats, start_progress_buffer, stop_progress_buffer
+from .auth import (
+    authenticate_user,
+    create_access_token,
+    get_password_hash_stats,
+    get_user_cache_stats,
+    shutdown_password_hashing,
+    warm_up_password_hashing,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+)
 from .routers import users, game_sessions, videos, goals, champion_pools
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+# Set up logging (queue-based, so handlers never block the event loop)
+configure_logging()
 logger = logging.getLogger(__name__)
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
+# The schema is managed by Alembic (`alembic upgrade head`), so importing the
+# app never touches the database.
 
-app = FastAPI(title="LoL Improve API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Again after a previous shutdown stopped it (no-op the first time)
+    configure_logging()
+    # Warm up connections and caches before the worker starts taking traffic
+    try:
+        await warm_up_pools()
+    except Exception as e:
+        # Don't refuse to start; the pool will connect lazily once the DB is reachable
+        logger.warning(f"Could not pre-warm the database pool: {str(e)}")
+    try:
+        await warm_up_catalog_snapshot()
+    except Exception as e:
+        # The first /videos/ request builds it instead
+        logger.warning(f"Could not build the catalog snapshot: {str(e)}")
+    warm_up_password_hashing()
+    start_progress_buffer()
+    yield
+    # Write buffered progress heartbeats while the database is still reachable
+    await stop_progress_buffer()
+    await stop_catalog_snapshot()
+    shutdown_password_hashing()
+    await dispose_engines()
+    stop_logging()
+
+
+# root_path_in_servers=False: /api requests arrive with root_path="/api" (see ApiPrefixMiddleware),
+# which must not leak into the cached OpenAPI schema served on both paths
+app = FastAPI(title="LoL Improve API", version="1.0.0", lifespan=lifespan, root_path_in_servers=False)
 
 # Configure CORS
 origins = [
@@ -37,43 +79,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets the frontend read the cursor for the next page of a video list and
+    # the catalog ETag
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-# Add middleware to log all requests
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    path = request.url.path
-    method = request.method
-    headers = dict(request.headers)
-    
-    # Don't log the full auth header for security
-    if 'authorization' in headers:
-        auth_header = headers['authorization']
-        if auth_header.startswith('Bearer '):
-            headers['authorization'] = f"Bearer {auth_header[7:15]}..."
-    
-    logger.info(f"Request: {method} {path}")
-    logger.info(f"Headers: {json.dumps(headers)}")
-    
-    try:
-        response = await call_next(request)
-        logger.info(f"Response: {method} {path} - Status: {response.status_code}")
-        return response
-    except Exception as e:
-        logger.error(f"Request failed: {method} {path}")
-        logger.error(f"Error: {str(e)}")
-        logger.error(traceback.format_exc())
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={"detail": str(e)},
-        )
+# Per-route latency, status and DB metrics for /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Structured access log for all requests (sampled, with duration and DB time)
+app.add_middleware(AccessLogMiddleware)
+
+# Serve /api/... for backwards compatibility by stripping the prefix before routing,
+# so every route is registered (and matched) only once
+app.add_middleware(ApiPrefixMiddleware)
 
 # Token endpoint for authentication
 @app.post("/token", response_model=schemas.Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_routed_db)):
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         logger.warning(f"Failed login attempt for user: {form_data.username}")
         raise HTTPException(
@@ -92,6 +118,23 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
 def read_root():
     return {"message": "Welcome to the LoL Improve API!"}
 
+@app.get("/health/db-pool")
+def read_db_pool_status():
+    """Live connection pool usage, for sizing DB_POOL_SIZE / DB_MAX_OVERFLOW under load"""
+    return get_pool_status()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    """Request and database metrics in the Prometheus text format"""
+    return render_metrics(
+        get_pool_status(),
+        get_user_cache_stats(),
+        get_password_hash_stats(),
+        get_catalog_snapshot_stats(),
+        get_progress_buffer_stats(),
+    )
+
 # Include routers
 app.include_router(users.router)
 app.include_router(game_sessions.router)
@@ -99,12 +142,5 @@ app.include_router(videos.router)
 app.include_router(goals.router)
 app.include_router(champion_pools.router)
 
-# Also include routers with /api prefix for backwards compatibility
-app.include_router(users.router, prefix="/api")
-app.include_router(game_sessions.router, prefix="/api")
-app.include_router(videos.router, prefix="/api")
-app.include_router(goals.router, prefix="/api")
-app.include_router(champion_pools.router, prefix="/api")
-
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
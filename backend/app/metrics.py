@@ -0,0 +1,230 @@
+import bisect
+import time
+from typing import Dict, List, Tuple
+
+from .api_prefix import api_prefix
+from .instrumentation import current_request_stats, start_request_stats
+
+# In-process request metrics, exposed in Prometheus text format at /metrics.
+# Everything is recorded on the event loop, so plain dicts are enough.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+# (method, route, prefix) -> histograms
+_latency: Dict[Tuple[str, str, str], Histogram] = {}
+_db_time: Dict[Tuple[str, str, str], Histogram] = {}
+_db_statements: Dict[Tuple[str, str, str], Histogram] = {}
+# (method, route, prefix, status) -> count
+_requests: Dict[Tuple[str, str, str, int], int] = {}
+
+# endpoint function -> route path template, built from the app's route table
+_route_templates: Dict[object, str] = {}
+
+
+def _route_template(scope) -> str:
+    """Route path template for the endpoint that handled the request"""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return UNMATCHED_ROUTE
+    template = _route_templates.get(endpoint)
+    if template is None:
+        for route in scope["app"].routes:
+            route_endpoint = getattr(route, "endpoint", None)
+            if route_endpoint is not None:
+                _route_templates[route_endpoint] = route.path
+        template = _route_templates.get(endpoint, UNMATCHED_ROUTE)
+    return template
+
+
+def observe_request(scope, status_code: int, duration: float, db_time: float, db_statements: int):
+    route = _route_template(scope)
+    prefix = api_prefix(scope)
+    key = (scope["method"], route, prefix)
+
+    histogram = _latency.get(key)
+    if histogram is None:
+        histogram = _latency[key] = Histogram(LATENCY_BUCKETS)
+        _db_time[key] = Histogram(LATENCY_BUCKETS)
+        _db_statements[key] = Histogram(STATEMENT_BUCKETS)
+    histogram.observe(duration)
+    _db_time[key].observe(db_time)
+    _db_statements[key].observe(db_statements)
+
+    status_key = key + (status_code,)
+    _requests[status_key] = _requests.get(status_key, 0) + 1
+
+
+class MetricsMiddleware:
+    """Records latency, status, DB time and statement count for every HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Share the stats object with the access log when it already started one
+        stats = current_request_stats.get() or start_request_stats()
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            observe_request(scope, status_code, time.perf_counter() - started, stats.db_time, stats.db_statements)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(method: str, route: str, prefix: str, **extra) -> str:
+    labels = {"method": method, "route": route, "prefix": prefix, **extra}
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items())
+
+
+def _render_histograms(lines: List[str], name: str, help_text: str, histograms: Dict[Tuple[str, str, str], Histogram]):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for (method, route, prefix), histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{{{_labels(method, route, prefix, le=bound)}}} {cumulative}")
+        lines.append(f"{name}_bucket{{{_labels(method, route, prefix, le='+Inf')}}} {histogram.count}")
+        lines.append(f"{name}_sum{{{_labels(method, route, prefix)}}} {histogram.total}")
+        lines.append(f"{name}_count{{{_labels(method, route, prefix)}}} {histogram.count}")
+
+
+def render_metrics(
+    pool_status: dict,
+    user_cache_stats: dict,
+    password_hash_stats: dict,
+    catalog_snapshot_stats: dict,
+    progress_buffer_stats: dict,
+) -> str:
+    """Render all metrics in the Prometheus text exposition format"""
+    lines: List[str] = []
+
+    lines.append("# HELP http_requests_total Requests handled, by route and status code")
+    lines.append("# TYPE http_requests_total counter")
+    for (method, route, prefix, status_code), count in sorted(_requests.items()):
+        lines.append(f"http_requests_total{{{_labels(method, route, prefix, status=status_code)}}} {count}")
+
+    _render_histograms(lines, "http_request_duration_seconds", "Request latency", _latency)
+    _render_histograms(lines, "http_request_db_seconds", "Time spent in SQL statements per request", _db_time)
+    _render_histograms(lines, "http_request_db_statements", "SQL statements executed per request", _db_statements)
+
+    pools = {"primary": pool_status}
+    if "replica" in pool_status:
+        pools["replica"] = pool_status["replica"]
+    gauges = (
+        ("db_pool_size", "Configured pool size", "pool_size"),
+        ("db_pool_max_overflow", "Configured maximum overflow", "max_overflow"),
+        ("db_pool_checked_out", "Connections currently checked out", "checked_out"),
+        ("db_pool_checked_in", "Idle connections in the pool", "checked_in"),
+        ("db_pool_overflow", "Overflow connections currently open", "overflow"),
+    )
+    for name, help_text, field in gauges:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for pool_name, status in pools.items():
+            lines.append(f'{name}{{pool="{pool_name}"}} {status[field]}')
+
+    lines.append("# HELP db_pool_saturation Checked-out connections as a fraction of pool_size + max_overflow")
+    lines.append("# TYPE db_pool_saturation gauge")
+    for pool_name, status in pools.items():
+        capacity = status["pool_size"] + status["max_overflow"]
+        saturation = status["checked_out"] / capacity if capacity else 0.0
+        lines.append(f'db_pool_saturation{{pool="{pool_name}"}} {saturation:.4f}')
+
+    lines.append("# HELP db_pool_checkouts_total Connections checked out from the primary pool")
+    lines.append("# TYPE db_pool_checkouts_total counter")
+    lines.append(f"db_pool_checkouts_total {pool_status['checkouts']}")
+    lines.append("# HELP db_pool_peak_checked_out Highest number of simultaneously checked-out primary connections")
+    lines.append("# TYPE db_pool_peak_checked_out gauge")
+    lines.append(f"db_pool_peak_checked_out {pool_status['peak_checked_out']}")
+
+    lines.append("# HELP auth_user_cache_lookups_total Authenticated-user cache lookups, by result")
+    lines.append("# TYPE auth_user_cache_lookups_total counter")
+    lines.append(f'auth_user_cache_lookups_total{{result="hit"}} {user_cache_stats["hits"]}')
+    lines.append(f'auth_user_cache_lookups_total{{result="miss"}} {user_cache_stats["misses"]}')
+    lines.append("# HELP auth_user_cache_hit_ratio Fraction of authenticated requests served from the user cache")
+    lines.append("# TYPE auth_user_cache_hit_ratio gauge")
+    lines.append(f"auth_user_cache_hit_ratio {user_cache_stats['hit_ratio']:.4f}")
+    lines.append("# HELP auth_user_cache_size Tokens currently cached")
+    lines.append("# TYPE auth_user_cache_size gauge")
+    lines.append(f"auth_user_cache_size {user_cache_stats['size']}")
+
+    lines.append("# HELP password_hash_queue_depth bcrypt jobs waiting for a free hashing thread")
+    lines.append("# TYPE password_hash_queue_depth gauge")
+    lines.append(f"password_hash_queue_depth {password_hash_stats['queue_depth']}")
+    lines.append("# HELP password_hash_in_progress bcrypt jobs running or waiting")
+    lines.append("# TYPE password_hash_in_progress gauge")
+    lines.append(f"password_hash_in_progress {password_hash_stats['pending']}")
+    lines.append("# HELP password_hash_workers Threads available for bcrypt")
+    lines.append("# TYPE password_hash_workers gauge")
+    lines.append(f"password_hash_workers {password_hash_stats['workers']}")
+    lines.append("# HELP password_hash_jobs_total bcrypt jobs, by outcome")
+    lines.append("# TYPE password_hash_jobs_total counter")
+    lines.append(f'password_hash_jobs_total{{result="completed"}} {password_hash_stats["completed"]}')
+    lines.append(f'password_hash_jobs_total{{result="rejected"}} {password_hash_stats["rejected"]}')
+
+    lines.append("# HELP progress_heartbeats_total Playback heartbeats received")
+    lines.append("# TYPE progress_heartbeats_total counter")
+    lines.append(f"progress_heartbeats_total {progress_buffer_stats['heartbeats']}")
+    lines.append("# HELP progress_buffer_rows_written_total Progress rows written by buffer flushes")
+    lines.append("# TYPE progress_buffer_rows_written_total counter")
+    lines.append(f"progress_buffer_rows_written_total {progress_buffer_stats['rows_written']}")
+    lines.append("# HELP progress_buffer_flushes_total Buffer flushes, by outcome")
+    lines.append("# TYPE progress_buffer_flushes_total counter")
+    lines.append(f'progress_buffer_flushes_total{{result="ok"}} {progress_buffer_stats["flushes"]}')
+    lines.append(f'progress_buffer_flushes_total{{result="error"}} {progress_buffer_stats["flush_errors"]}')
+    lines.append("# HELP progress_buffer_pending Videos with a buffered position not yet written")
+    lines.append("# TYPE progress_buffer_pending gauge")
+    lines.append(f"progress_buffer_pending {progress_buffer_stats['pending']}")
+
+    if catalog_snapshot_stats["enabled"]:
+        lines.append("# HELP catalog_snapshot_videos Videos in the in-memory catalog snapshot")
+        lines.append("# TYPE catalog_snapshot_videos gauge")
+        lines.append(f"catalog_snapshot_videos {catalog_snapshot_stats['rows']}")
+        lines.append("# HELP catalog_snapshot_bytes Approximate memory held by the catalog snapshot")
+        lines.append("# TYPE catalog_snapshot_bytes gauge")
+        lines.append(f"catalog_snapshot_bytes {catalog_snapshot_stats['bytes']}")
+        lines.append("# HELP catalog_snapshot_rebuilds_total Catalog snapshot rebuilds, by kind")
+        lines.append("# TYPE catalog_snapshot_rebuilds_total counter")
+        for kind, count in catalog_snapshot_stats["rebuilds"].items():
+            lines.append(f'catalog_snapshot_rebuilds_total{{kind="{kind}"}} {count}')
+        lines.append("# HELP catalog_snapshot_last_rebuild_seconds Duration of the latest rebuild, by kind")
+        lines.append("# TYPE catalog_snapshot_last_rebuild_seconds gauge")
+        for kind, seconds in catalog_snapshot_stats["last_rebuild_seconds"].items():
+            lines.append(f'catalog_snapshot_last_rebuild_seconds{{kind="{kind}"}} {seconds:.6f}')
+
+    return "\n".join(lines) + "\n"
@@ -1,6 +1,7 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Text, JSON, Float, Enum
-from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy import DDL, BigInteger, Boolean, Column, Computed, ForeignKey, Index, Integer, String, DateTime, Text, JSON, Float, Enum, UniqueConstraint, event
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import deferred, relationship
+from sqlalchemy.sql import expression, func
 import enum
 
 from .database import Base
@@ -19,8 +20,8 @@ class User(Base):
     email = Column(String, unique=True, index=True)
     username = Column(String, unique=True, index=True)
     hashed_password = Column(String)
-    is_active = Column(Boolean, default=True)
-    is_admin = Column(Boolean, default=False)
+    is_active = Column(Boolean, default=True, nullable=False, server_default=expression.true())
+    is_admin = Column(Boolean, default=False, nullable=False, server_default=expression.false())
     
     game_sessions = relationship("GameSession", back_populates="user")
     video_progress = relationship("VideoProgress", back_populates="user")
@@ -54,6 +55,22 @@ class VideoCategory(Base):
     videos = relationship("VideoTutorial", back_populates="category")
 
 
+class CatalogVersion(Base):
+    """Single row counting catalog writes, shared by all workers (see catalog.py)"""
+    __tablename__ = "catalog_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+
+# The row is part of the schema, also when it is created without migrations
+event.listen(
+    CatalogVersion.__table__,
+    "after_create",
+    DDL("INSERT INTO catalog_version (id, version) VALUES (1, 0)"),
+)
+
+
 class Creator(Base):
     __tablename__ = "creators"
 
@@ -65,6 +82,20 @@ class Creator(Base):
     # Relationships
     videos = relationship("VideoTutorial", back_populates="creator_obj")
 
+    # Trigram index (pg_trgm) for substring and fuzzy matches on the name
+    __table_args__ = (
+        Index("ix_creators_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+    )
+
+
+# Full-text search document for videos: title weighs most, then key points, then description
+SEARCH_CONFIG = "english"
+VIDEO_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(key_points, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+)
+
 
 class VideoTutorial(Base):
     __tablename__ = "video_tutorials"
@@ -85,7 +116,9 @@ class VideoTutorial(Base):
     creator_id = Column(String, nullable=True)  # Keep original creator_id
     added_date = Column(DateTime, nullable=True)  # When it was added to kemono
     published_date = Column(DateTime, nullable=True)  # Original publish date
-    tags = Column(JSON, nullable=True)  # Store tags as JSON array
+    tags = Column(JSONB, nullable=True)  # Store tags as JSON array
+    # Generated by Postgres from the columns above; deferred so it's never loaded with the rows
+    search_vector = deferred(Column(TSVECTOR, Computed(VIDEO_SEARCH_VECTOR, persisted=True)))
     
     # Relationships
     category_id = Column(Integer, ForeignKey("video_categories.id"), nullable=True)
@@ -93,6 +126,17 @@ class VideoTutorial(Base):
     progress = relationship("VideoProgress", back_populates="video")
     creator_obj = relationship("Creator", back_populates="videos")
 
+    # Match the (sort column, id) order of the keyset-paginated video lists, plus the
+    # full-text, trigram (substring / fuzzy title) and tag containment indexes
+    __table_args__ = (
+        Index("ix_video_tutorials_published_date_keyset", "published_date", "id"),
+        Index("ix_video_tutorials_title_keyset", "title", "id"),
+        Index("ix_video_tutorials_creator_keyset", "creator", "id"),
+        Index("ix_video_tutorials_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_video_tutorials_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        Index("ix_video_tutorials_tags", "tags", postgresql_using="gin", postgresql_ops={"tags": "jsonb_path_ops"}),
+    )
+
 
 class VideoProgress(Base):
     __tablename__ = "video_progress"
@@ -110,6 +154,14 @@ class VideoProgress(Base):
     user = relationship("User", back_populates="video_progress")
     video = relationship("VideoTutorial", back_populates="progress")
 
+    # One row per user and video, written with INSERT ... ON CONFLICT; its index serves
+    # the lookups by user and by user and video. Deleting a video looks its rows up by
+    # video alone (the foreign key check and the ORM's cascade), hence the second index
+    __table_args__ = (
+        UniqueConstraint("user_id", "video_id", name="uq_video_progress_user_id_video_id"),
+        Index("ix_video_progress_video_id", "video_id"),
+    )
+
 
 class Goal(Base):
     __tablename__ = "goals"
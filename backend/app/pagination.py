@@ -0,0 +1,76 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import DateTime, and_, or_
+
+# Keyset ("cursor") pagination: instead of OFFSET, a page continues after the sort
+# key and id of the previous page's last row, so deep pages cost the same as the
+# first one. The cursor is opaque to clients and handed out in this header.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_by: str, sort_order: str, value: Any, row_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort_by, sort_order, value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str, sort_column) -> Tuple[Any, int]:
+    """Return the (sort value, id) a cursor points at; 400 if it is malformed or for another sort"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort_by, cursor_sort_order, value, row_id = json.loads(payload)
+        if value is not None and isinstance(sort_column.type, DateTime):
+            value = datetime.fromisoformat(value)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if (cursor_sort_by, cursor_sort_order) != (sort_by, sort_order) or not isinstance(row_id, int):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor does not match the requested sort_by / sort_order",
+        )
+    return value, row_id
+
+
+def apply_keyset(query, sort_column, id_column, descending: bool, after: Optional[Tuple[Any, int]] = None):
+    """Order by (sort_column, id) with NULL sort values last, starting after the given key"""
+    if sort_column is id_column:
+        if after is not None:
+            query = query.where(id_column < after[1] if descending else id_column > after[1])
+        return query.order_by(id_column.desc() if descending else id_column.asc())
+
+    if after is not None:
+        value, row_id = after
+        id_after = id_column < row_id if descending else id_column > row_id
+        if value is None:
+            # Already in the trailing NULL group
+            query = query.where(sort_column.is_(None), id_after)
+        else:
+            value_after = sort_column < value if descending else sort_column > value
+            query = query.where(or_(
+                sort_column.is_(None),
+                value_after,
+                and_(sort_column == value, id_after),
+            ))
+
+    if descending:
+        return query.order_by(sort_column.desc().nulls_last(), id_column.desc())
+    return query.order_by(sort_column.asc().nulls_last(), id_column.asc())
+
+
+def set_next_cursor(response: Response, rows: list, limit: int, sort_by: str, sort_order: str):
+    """Trim the extra row fetched to detect another page and advertise the cursor for it.
+
+    Rows are result rows whose first element is the entity and last element its sort value.
+    """
+    if len(rows) <= limit:
+        return rows
+    rows = rows[:limit]
+    last = rows[-1]
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor(sort_by, sort_order, last[-1], last[0].id)
+    return rows
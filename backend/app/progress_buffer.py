@@ -0,0 +1,188 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from . import models
+from .database import AsyncSessionLocal
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Write-behind buffer for playback heartbeats (POST /videos/{id}/progress/heartbeat).
+# While a video plays the player reports its position every few seconds; instead of
+# a read and a commit per report, the latest position per (user, video) is kept here
+# and written in one batch every PROGRESS_FLUSH_INTERVAL_SECONDS, which is also the
+# most a crashed worker can lose. Pause and complete events write their own entry
+# straight away, a full buffer is flushed, and the app flushes on shutdown.
+#
+# Each worker has its own buffer, so a full progress write can't always take back a
+# buffered heartbeat (another worker may hold it, or it may already be on its way to
+# the database). Heartbeat writes therefore only replace rows watched less recently
+# than the heartbeat was heard, and an older heartbeat never overwrites a newer write.
+
+
+@dataclass
+class PendingProgress:
+    position: float
+    completed: bool
+    heard_at: datetime  # becomes last_watched
+
+
+_pending: Dict[Tuple[int, int], PendingProgress] = {}
+# Batches being written; entries taken by take_pending are removed from them too, so a
+# failed write doesn't put them back
+_in_flight: List[Dict[Tuple[int, int], PendingProgress]] = []
+_flush_lock = asyncio.Lock()
+_flusher: Optional[asyncio.Task] = None
+progress_buffer_stats = {"heartbeats": 0, "flushes": 0, "rows_written": 0, "flush_errors": 0}
+
+
+def record_heartbeat(user_id: int, video_id: int, position: float, completed: bool = False):
+    """Buffer a playback position; later heartbeats for the same video replace it"""
+    progress_buffer_stats["heartbeats"] += 1
+    key = (user_id, video_id)
+    previous = _pending.get(key)
+    _pending[key] = PendingProgress(
+        position=position,
+        # Finishing a video sticks until the row is written
+        completed=completed or (previous is not None and previous.completed),
+        heard_at=datetime.utcnow(),
+    )
+
+
+def take_pending(user_id: int, video_id: int) -> Optional[PendingProgress]:
+    """
+    Remove and return a buffered heartbeat, for a full progress write to fold in, so an
+    older buffered position can't overwrite it on the next flush
+    """
+    key = (user_id, video_id)
+    entry = _pending.pop(key, None)
+    for batch in _in_flight:
+        in_flight = batch.pop(key, None)
+        if entry is None:
+            entry = in_flight
+    return entry
+
+
+def buffer_full() -> bool:
+    return len(_pending) >= settings.progress_buffer_max_entries
+
+
+async def flush_progress():
+    """Write every buffered heartbeat: a handful of statements and one commit per batch"""
+    async with _flush_lock:
+        global _pending
+        if not _pending:
+            return
+        batch, _pending = _pending, {}
+        await _write(batch)
+
+
+async def flush_heartbeat(user_id: int, video_id: int):
+    """Write the buffered heartbeat of one video now, e.g. when playback pauses"""
+    entry = _pending.pop((user_id, video_id), None)
+    if entry is not None:
+        await _write({(user_id, video_id): entry})
+
+
+async def _write(batch: Dict[Tuple[int, int], PendingProgress]):
+    _in_flight.append(batch)
+    try:
+        written = await _write_batch(dict(batch))
+    except BaseException as e:
+        # Keep them for the next flush (also when cancelled on shutdown) unless newer
+        # heartbeats arrived or a full write took them meanwhile
+        for key, entry in batch.items():
+            _pending.setdefault(key, entry)
+        if not isinstance(e, Exception):
+            raise
+        progress_buffer_stats["flush_errors"] += 1
+        logger.error(f"Could not write {len(batch)} buffered progress updates: {str(e)}")
+        return
+    finally:
+        _in_flight.remove(batch)
+    progress_buffer_stats["flushes"] += 1
+    progress_buffer_stats["rows_written"] += written
+
+
+async def _write_batch(batch: Dict[Tuple[int, int], PendingProgress]) -> int:
+    """Upsert a batch of heartbeats, returning how many were sent to the database"""
+    table = models.VideoProgress.__table__
+    async with AsyncSessionLocal() as db:
+        # Heartbeats aren't checked against the catalog when they arrive; drop the
+        # ones for videos that don't exist (any more)
+        video_ids = {video_id for _, video_id in batch}
+        known_videos = set(await db.scalars(
+            select(models.VideoTutorial.id).where(models.VideoTutorial.id.in_(video_ids))
+        ))
+        batch = {key: entry for key, entry in batch.items() if key[1] in known_videos}
+        if not batch:
+            return 0
+
+        # One upsert for the whole batch (executemany); is_bookmarked and notes are
+        # left as they are, a video once watched stays watched, and rows written
+        # after the heartbeat was heard are left alone
+        rows = [
+            {
+                "user_id": user_id,
+                "video_id": video_id,
+                "watch_progress": entry.position,
+                "is_watched": entry.completed,
+                "is_bookmarked": False,
+                "last_watched": entry.heard_at,
+            }
+            for (user_id, video_id), entry in batch.items()
+        ]
+        upsert = pg_insert(table)
+        await db.execute(
+            upsert.on_conflict_do_update(
+                index_elements=[table.c.user_id, table.c.video_id],
+                set_={
+                    "watch_progress": upsert.excluded.watch_progress,
+                    "is_watched": or_(table.c.is_watched.is_(True), upsert.excluded.is_watched),
+                    "last_watched": upsert.excluded.last_watched,
+                },
+                where=or_(
+                    table.c.last_watched.is_(None),
+                    table.c.last_watched < upsert.excluded.last_watched,
+                ),
+            ),
+            rows
+        )
+        await db.commit()
+    return len(batch)
+
+
+async def _flush_periodically():
+    while True:
+        await asyncio.sleep(settings.progress_flush_interval_seconds)
+        await flush_progress()
+
+
+def start_progress_buffer():
+    """Start the background flush, called when the app starts"""
+    global _flusher
+    if _flusher is None:
+        _flusher = asyncio.create_task(_flush_periodically())
+
+
+async def stop_progress_buffer():
+    """Stop the background flush and write whatever is still buffered, called on shutdown"""
+    global _flusher
+    if _flusher is not None:
+        _flusher.cancel()
+        try:
+            await _flusher
+        except asyncio.CancelledError:
+            pass
+        _flusher = None
+    await flush_progress()
+
+
+def get_progress_buffer_stats() -> dict:
+    return {**progress_buffer_stats, "pending": len(_pending)}
@@ -0,0 +1,78 @@
+from functools import lru_cache
+from typing import Any, FrozenSet, List, Optional
+
+from fastapi import Response
+from pydantic import ConfigDict, TypeAdapter, create_model, field_validator
+
+from . import schemas
+from .settings import settings
+
+# Fast path for large list responses (FAST_JSON_RESPONSES=true). FastAPI normally
+# validates the endpoint's return value against response_model, turns it into plain
+# Python objects and encodes those with the stdlib json module. Here a TypeAdapter
+# built once at import validates the rows and writes the JSON bytes in a single pass
+# in pydantic-core, with the same output. response_model stays on the routes for the
+# OpenAPI schema.
+VIDEO_LIST = TypeAdapter(List[schemas.VideoTutorialWithCategory])
+GAME_SESSION_LIST = TypeAdapter(List[schemas.GameSession])
+
+
+class TypeAdapterJSONResponse(Response):
+    """JSON response rendered by a precompiled TypeAdapter (rows may be ORM objects)"""
+    media_type = "application/json"
+
+    def __init__(self, content: Any, adapter: TypeAdapter, **kwargs):
+        self.adapter = adapter
+        super().__init__(content, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        return self.adapter.dump_json(self.adapter.validate_python(content, from_attributes=True))
+
+
+def list_response(adapter: TypeAdapter, items, response: Optional[Response] = None):
+    """
+    Return value for a list endpoint: a TypeAdapterJSONResponse when FAST_JSON_RESPONSES is on,
+    carrying over headers set on the endpoint's `response` (e.g. X-Next-Cursor, ETag), and the
+    items unchanged for FastAPI's usual serialization otherwise.
+    """
+    if not settings.fast_json_responses:
+        return items
+    headers = dict(response.headers) if response is not None else None
+    return TypeAdapterJSONResponse(items, adapter, headers=headers)
+
+
+@lru_cache(maxsize=64)
+def sparse_video_model(fields: FrozenSet[str]):
+    """VideoTutorialWithCategory cut down to `fields` (from video_lists.parse_fields), built once per set"""
+    model_fields = schemas.VideoTutorialWithCategory.model_fields
+    definitions = {
+        name: (field.annotation, ... if field.is_required() else field.default)
+        for name, field in model_fields.items() if name in fields
+    }
+    validators = {}
+    if "tags" in fields:
+        validators["validate_tags"] = field_validator("tags", mode="before")(
+            lambda cls, v: schemas.parse_tags(v)
+        )
+    return create_model(
+        "VideoTutorialFields",
+        __config__=ConfigDict(from_attributes=True),
+        __validators__=validators,
+        **definitions
+    )
+
+
+@lru_cache(maxsize=64)
+def sparse_video_list(fields: FrozenSet[str]) -> TypeAdapter:
+    return TypeAdapter(List[sparse_video_model(fields)])
+
+
+def video_list_response(items, response: Optional[Response] = None, fields: Optional[FrozenSet[str]] = None):
+    """
+    list_response for the video lists. Items trimmed to `fields` no longer match the route's
+    response_model, so they are always encoded with the trimmed model's adapter.
+    """
+    if fields is None:
+        return list_response(VIDEO_LIST, items, response)
+    headers = dict(response.headers) if response is not None else None
+    return TypeAdapterJSONResponse(items, sparse_video_list(fields), headers=headers)
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List, Optional
 from datetime import datetime
 
 from .. import models, schemas, auth
-from ..database import get_db
+from ..database import get_routed_db
 
 router = APIRouter(
     prefix="/champion-pools",
@@ -13,11 +15,23 @@ router = APIRouter(
 )
 
 
+# Helper to build a pool query with its champions loaded up front
+def user_pools_query(user_id: int):
+    """Select a user's champion pools, eager-loading their champions"""
+    # Champions are serialized with every pool and can't be lazy-loaded in async code
+    return (
+        select(models.ChampionPool)
+        .where(models.ChampionPool.user_id == user_id)
+        .options(selectinload(models.ChampionPool.champions))
+        .execution_options(populate_existing=True)
+    )
+
+
 @router.post("/", response_model=schemas.ChampionPool, status_code=status.HTTP_201_CREATED)
-def create_champion_pool(
+async def create_champion_pool(
     champion_pool: schemas.ChampionPoolCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Create a new champion pool"""
     db_pool = models.ChampionPool(
@@ -27,8 +41,8 @@ def create_champion_pool(
         user_id=current_user.id
     )
     db.add(db_pool)
-    db.commit()
-    db.refresh(db_pool)
+    await db.commit()
+    await db.refresh(db_pool)
     
     # Add champions if provided
     if champion_pool.champions:
@@ -41,38 +55,37 @@ def create_champion_pool(
                 pool_id=db_pool.id
             )
             db.add(db_champion)
-        db.commit()
-        db.refresh(db_pool)
-        
-    return db_pool
+        await db.commit()
+    
+    # Reload the pool together with its champions for the response
+    return await db.scalar(user_pools_query(current_user.id).where(models.ChampionPool.id == db_pool.id))
 
 
 @router.get("/", response_model=List[schemas.ChampionPool])
-def read_champion_pools(
+async def read_champion_pools(
     category: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Get all champion pools for the current user, optionally filtered by category"""
-    query = db.query(models.ChampionPool).filter(models.ChampionPool.user_id == current_user.id)
+    query = user_pools_query(current_user.id)
     
     if category:
-        query = query.filter(models.ChampionPool.category == category)
+        query = query.where(models.ChampionPool.category == category)
         
-    return query.all()
+    return (await db.scalars(query)).all()
 
 
 @router.get("/{pool_id}", response_model=schemas.ChampionPool)
-def read_champion_pool(
+async def read_champion_pool(
     pool_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Get a specific champion pool by ID"""
-    db_pool = db.query(models.ChampionPool).filter(
-        models.ChampionPool.id == pool_id,
-        models.ChampionPool.user_id == current_user.id
-    ).first()
+    db_pool = await db.scalar(user_pools_query(current_user.id).where(
+        models.ChampionPool.id == pool_id
+    ))
     
     if not db_pool:
         raise HTTPException(status_code=404, detail="Champion pool not found")
@@ -81,17 +94,16 @@ def read_champion_pool(
 
 
 @router.put("/{pool_id}", response_model=schemas.ChampionPool)
-def update_champion_pool(
+async def update_champion_pool(
     pool_id: int,
     pool_update: schemas.ChampionPoolUpdate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Update a champion pool's metadata and champions"""
-    db_pool = db.query(models.ChampionPool).filter(
-        models.ChampionPool.id == pool_id,
-        models.ChampionPool.user_id == current_user.id
-    ).first()
+    db_pool = await db.scalar(user_pools_query(current_user.id).where(
+        models.ChampionPool.id == pool_id
+    ))
     
     if not db_pool:
         raise HTTPException(status_code=404, detail="Champion pool not found")
@@ -107,9 +119,9 @@ def update_champion_pool(
     # Update champions if provided
     if pool_update.champions is not None:
         # Remove existing champions
-        db.query(models.ChampionPoolEntry).filter(
+        await db.execute(delete(models.ChampionPoolEntry).where(
             models.ChampionPoolEntry.pool_id == pool_id
-        ).delete()
+        ))
         
         # Add new champions
         for champion in pool_update.champions:
@@ -122,53 +134,52 @@ def update_champion_pool(
             )
             db.add(db_champion)
     
-    db.commit()
-    db.refresh(db_pool)
-    return db_pool
+    await db.commit()
+    
+    # Reload the pool so the response reflects the replaced champions
+    return await db.scalar(user_pools_query(current_user.id).where(models.ChampionPool.id == pool_id))
 
 
 @router.delete("/{pool_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_champion_pool(
+async def delete_champion_pool(
     pool_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Delete a champion pool"""
-    db_pool = db.query(models.ChampionPool).filter(
-        models.ChampionPool.id == pool_id,
-        models.ChampionPool.user_id == current_user.id
-    ).first()
+    db_pool = await db.scalar(user_pools_query(current_user.id).where(
+        models.ChampionPool.id == pool_id
+    ))
     
     if not db_pool:
         raise HTTPException(status_code=404, detail="Champion pool not found")
     
-    db.delete(db_pool)
-    db.commit()
+    await db.delete(db_pool)
+    await db.commit()
     return None
 
 
 @router.post("/{pool_id}/champions", response_model=schemas.ChampionPoolEntry)
-def add_champion_to_pool(
+async def add_champion_to_pool(
     pool_id: int,
     champion: schemas.ChampionPoolEntryCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Add a champion to a pool"""
     # Verify pool exists and belongs to user
-    db_pool = db.query(models.ChampionPool).filter(
-        models.ChampionPool.id == pool_id,
-        models.ChampionPool.user_id == current_user.id
-    ).first()
+    db_pool = await db.scalar(user_pools_query(current_user.id).where(
+        models.ChampionPool.id == pool_id
+    ))
     
     if not db_pool:
         raise HTTPException(status_code=404, detail="Champion pool not found")
     
     # Check if champion already exists in this pool
-    existing_champion = db.query(models.ChampionPoolEntry).filter(
+    existing_champion = await db.scalar(select(models.ChampionPoolEntry).where(
         models.ChampionPoolEntry.pool_id == pool_id,
         models.ChampionPoolEntry.champion_id == champion.champion_id
-    ).first()
+    ))
     
     if existing_champion:
         raise HTTPException(
@@ -186,85 +197,80 @@ def add_champion_to_pool(
     )
     
     db.add(db_champion)
-    db.commit()
-    db.refresh(db_champion)
+    await db.commit()
+    await db.refresh(db_champion)
     return db_champion
 
 
 @router.delete("/{pool_id}/champions/{champion_id}", status_code=status.HTTP_204_NO_CONTENT)
-def remove_champion_from_pool(
+async def remove_champion_from_pool(
     pool_id: int,
     champion_id: str,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Remove a champion from a pool"""
     # Verify pool exists and belongs to user
-    db_pool = db.query(models.ChampionPool).filter(
-        models.ChampionPool.id == pool_id,
-        models.ChampionPool.user_id == current_user.id
-    ).first()
+    db_pool = await db.scalar(user_pools_query(current_user.id).where(
+        models.ChampionPool.id == pool_id
+    ))
     
     if not db_pool:
         raise HTTPException(status_code=404, detail="Champion pool not found")
     
     # Find champion in pool
-    db_champion = db.query(models.ChampionPoolEntry).filter(
+    db_champion = await db.scalar(select(models.ChampionPoolEntry).where(
         models.ChampionPoolEntry.pool_id == pool_id,
         models.ChampionPoolEntry.champion_id == champion_id
-    ).first()
+    ))
     
     if not db_champion:
         raise HTTPException(status_code=404, detail="Champion not found in pool")
     
-    db.delete(db_champion)
-    db.commit()
+    await db.delete(db_champion)
+    await db.commit()
     return None
 
 
 @router.get("/champions/all", response_model=List[schemas.ChampionPoolEntry])
-def get_all_pooled_champions(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+async def get_all_pooled_champions(
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Get all champions from all pools for the current user"""
     # Find all pools belonging to the user
-    user_pools = db.query(models.ChampionPool).filter(
+    pool_ids = (await db.scalars(select(models.ChampionPool.id).where(
         models.ChampionPool.user_id == current_user.id
-    ).all()
-    
-    pool_ids = [pool.id for pool in user_pools]
+    ))).all()
     
     # Get all champions from these pools
-    champions = db.query(models.ChampionPoolEntry).filter(
+    champions = (await db.scalars(select(models.ChampionPoolEntry).where(
         models.ChampionPoolEntry.pool_id.in_(pool_ids)
-    ).all()
+    ))).all()
     
     return champions
 
 
 @router.get("/champions/category/{category}", response_model=List[schemas.ChampionPoolEntry])
-def get_champions_by_category(
+async def get_champions_by_category(
     category: str,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Get all champions from pools of a specific category"""
     # Find all pools of the specified category belonging to the user
-    category_pools = db.query(models.ChampionPool).filter(
+    pool_ids = (await db.scalars(select(models.ChampionPool.id).where(
         models.ChampionPool.user_id == current_user.id,
         models.ChampionPool.category == category
-    ).all()
-    
-    pool_ids = [pool.id for pool in category_pools]
+    ))).all()
     
     # If no pools found, return empty list
     if not pool_ids:
         return []
     
     # Get all champions from these pools
-    champions = db.query(models.ChampionPoolEntry).filter(
+    champions = (await db.scalars(select(models.ChampionPoolEntry).where(
         models.ChampionPoolEntry.pool_id.in_(pool_ids)
-    ).all()
+    ))).all()
     
     return champions 
\ No newline at end of file
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from datetime import datetime
 
 from .. import models, schemas, auth
-from ..database import get_db
+from ..database import get_routed_db
+from ..responses import GAME_SESSION_LIST, list_response
 
 router = APIRouter(
     prefix="/game-sessions",
@@ -14,10 +16,10 @@ router = APIRouter(
 
 
 @router.post("/", response_model=schemas.GameSession, status_code=status.HTTP_201_CREATED)
-def create_game_session(
+async def create_game_session(
     game_session: schemas.GameSessionCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     # Convert the game_session to a dict
     game_session_data = game_session.model_dump()
@@ -28,10 +30,10 @@ def create_game_session(
     # Validate that all goals in goal_progress belong to the user
     if goal_progress:
         goal_ids = [g.get("goal_id") for g in goal_progress]
-        user_goals = db.query(models.Goal).filter(
+        user_goals = (await db.scalars(select(models.Goal).where(
             models.Goal.id.in_(goal_ids),
             models.Goal.user_id == current_user.id
-        ).all()
+        ))).all()
         
         if len(user_goals) != len(goal_ids):
             raise HTTPException(
@@ -46,50 +48,50 @@ def create_game_session(
         goal_progress=goal_progress
     )
     db.add(db_game_session)
-    db.commit()
-    db.refresh(db_game_session)
+    await db.commit()
+    await db.refresh(db_game_session)
     return db_game_session
 
 
 @router.get("/", response_model=List[schemas.GameSession])
-def read_game_sessions(
+async def read_game_sessions(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
-    game_sessions = db.query(models.GameSession).filter(
+    game_sessions = (await db.scalars(select(models.GameSession).where(
         models.GameSession.user_id == current_user.id
-    ).offset(skip).limit(limit).all()
-    return game_sessions
+    ).offset(skip).limit(limit))).all()
+    return list_response(GAME_SESSION_LIST, game_sessions)
 
 
 @router.get("/{game_session_id}", response_model=schemas.GameSession)
-def read_game_session(
+async def read_game_session(
     game_session_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
-    db_game_session = db.query(models.GameSession).filter(
+    db_game_session = await db.scalar(select(models.GameSession).where(
         models.GameSession.id == game_session_id,
         models.GameSession.user_id == current_user.id
-    ).first()
+    ))
     if db_game_session is None:
         raise HTTPException(status_code=404, detail="Game session not found")
     return db_game_session
 
 
 @router.put("/{game_session_id}", response_model=schemas.GameSession)
-def update_game_session(
+async def update_game_session(
     game_session_id: int,
     game_session: schemas.GameSessionBase,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
-    db_game_session = db.query(models.GameSession).filter(
+    db_game_session = await db.scalar(select(models.GameSession).where(
         models.GameSession.id == game_session_id,
         models.GameSession.user_id == current_user.id
-    ).first()
+    ))
     if db_game_session is None:
         raise HTTPException(status_code=404, detail="Game session not found")
     
@@ -102,10 +104,10 @@ def update_game_session(
     # Validate that all goals in goal_progress belong to the user
     if goal_progress:
         goal_ids = [g.get("goal_id") for g in goal_progress]
-        user_goals = db.query(models.Goal).filter(
+        user_goals = (await db.scalars(select(models.Goal).where(
             models.Goal.id.in_(goal_ids),
             models.Goal.user_id == current_user.id
-        ).all()
+        ))).all()
         
         if len(user_goals) != len(goal_ids):
             raise HTTPException(
@@ -116,24 +118,24 @@ def update_game_session(
     for key, value in game_session_data.items():
         setattr(db_game_session, key, value)
     
-    db.commit()
-    db.refresh(db_game_session)
+    await db.commit()
+    await db.refresh(db_game_session)
     return db_game_session
 
 
 @router.delete("/{game_session_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_game_session(
+async def delete_game_session(
     game_session_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
-    db_game_session = db.query(models.GameSession).filter(
+    db_game_session = await db.scalar(select(models.GameSession).where(
         models.GameSession.id == game_session_id,
         models.GameSession.user_id == current_user.id
-    ).first()
+    ))
     if db_game_session is None:
         raise HTTPException(status_code=404, detail="Game session not found")
     
-    db.delete(db_game_session)
-    db.commit()
+    await db.delete(db_game_session)
+    await db.commit()
     return None
@@ -1,12 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body, Query
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import ValidationError
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
 from typing import List, Dict, Any
 from datetime import datetime
-from sqlalchemy import or_, and_
+from sqlalchemy import case, select, update, func, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
 
 from .. import models, schemas, auth
-from ..database import get_db
+from ..catalog import bump_catalog_version, catalog_conditional_get
+from ..catalog_snapshot import can_serve_from_snapshot, read_snapshot_videos
+from ..database import get_routed_db, routed_session_factory
+from ..facets import video_facets
+from ..progress_buffer import buffer_full, flush_heartbeat, flush_progress, record_heartbeat, take_pending
+from ..responses import video_list_response
+from ..search import (
+    fuzzy_match,
+    fuzzy_rank,
+    load_search_snippets,
+    video_search_query,
+    video_search_rank,
+    video_tags_filter,
+)
 from ..services.kemono_service import KemonoService
+from ..video_lists import (
+    accepts_gzip,
+    fetch_video_page,
+    filter_video_search,
+    load_video_bundle,
+    parse_fields,
+    stream_video_export,
+    video_list_query,
+    video_load_options,
+)
 
 router = APIRouter(
     prefix="/videos",
@@ -16,127 +47,143 @@ router = APIRouter(
 
 
 # Helper function to migrate creators from videos
-def migrate_creators_from_videos(
-    db: Session,
-    current_user: models.User
+async def migrate_creators_from_videos(
+    db: AsyncSession,
+    current_user: schemas.User
 ):
     """Create Creator entries for all existing videos"""
     # Get all unique creator names from videos
-    videos = db.query(models.VideoTutorial).all()
-    unique_creators = set()
-    for video in videos:
-        if video.creator and video.creator.strip():
-            unique_creators.add(video.creator.strip())
-    
-    # Create Creator for each unique name
-    created_creators = []
-    for creator_name in unique_creators:
-        # Check if creator already exists by name
-        existing_creator = db.query(models.Creator).filter(models.Creator.name == creator_name).first()
-        if not existing_creator:
-            # Create new creator
-            new_creator = models.Creator(name=creator_name)
-            db.add(new_creator)
-            db.commit()
-            db.refresh(new_creator)
-            created_creators.append(new_creator)
-            
-            # Update all videos with this creator
-            videos_to_update = db.query(models.VideoTutorial).filter(models.VideoTutorial.creator == creator_name).all()
-            for video in videos_to_update:
-                video.creator_relation_id = new_creator.id
-            db.commit()
-        else:
-            created_creators.append(existing_creator)
+    creator_names = (await db.scalars(
+        select(models.VideoTutorial.creator).where(models.VideoTutorial.creator.isnot(None)).distinct()
+    )).all()
+    unique_creators = {name.strip() for name in creator_names if name.strip()}
+    if not unique_creators:
+        return []
+    
+    # Load the creators that already exist in one query
+    existing_creators = {
+        creator.name: creator
+        for creator in (await db.scalars(
+            select(models.Creator).where(models.Creator.name.in_(unique_creators))
+        )).all()
+    }
     
-    return created_creators
+    # Create Creator for each new name
+    new_creators = [models.Creator(name=name) for name in unique_creators if name not in existing_creators]
+    if new_creators:
+        db.add_all(new_creators)
+        await db.flush()
+        
+        # Link all videos of the new creators in a single UPDATE ... FROM creators
+        await db.execute(
+            update(models.VideoTutorial)
+            .where(
+                models.VideoTutorial.creator == models.Creator.name,
+                models.Creator.id.in_([creator.id for creator in new_creators])
+            )
+            .values(creator_relation_id=models.Creator.id)
+            .execution_options(synchronize_session=False)
+        )
+        # The UPDATE bypasses the session: link the videos it already holds (such as the
+        # ones just imported) too, so they aren't returned with the old value
+        creator_ids = {creator.name: creator.id for creator in new_creators}
+        for obj in list(db.identity_map.values()):
+            if isinstance(obj, models.VideoTutorial) and obj.creator in creator_ids:
+                set_committed_value(obj, "creator_relation_id", creator_ids[obj.creator])
+        await bump_catalog_version(db)
+        await db.commit()
+    
+    return list(existing_creators.values()) + new_creators
 
 
 # Video Category Endpoints
 @router.post("/categories/", response_model=schemas.VideoCategory, status_code=status.HTTP_201_CREATED)
-def create_video_category(
+async def create_video_category(
     category: schemas.VideoCategoryCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Create a new video category"""
     db_category = models.VideoCategory(**category.dict())
     db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
+    await bump_catalog_version(db, ())
+    await db.commit()
+    await db.refresh(db_category)
     return db_category
 
 
-@router.get("/categories/", response_model=List[schemas.VideoCategory])
-def read_video_categories(
+@router.get("/categories/", response_model=List[schemas.VideoCategory], dependencies=[Depends(catalog_conditional_get)])
+async def read_video_categories(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Get all video categories"""
-    categories = db.query(models.VideoCategory).offset(skip).limit(limit).all()
+    categories = (await db.scalars(select(models.VideoCategory).offset(skip).limit(limit))).all()
     return categories
 
 
-@router.get("/categories/{category_id}", response_model=schemas.VideoCategory)
-def read_video_category(
+@router.get("/categories/{category_id}", response_model=schemas.VideoCategory, dependencies=[Depends(catalog_conditional_get)])
+async def read_video_category(
     category_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Get a specific video category"""
-    db_category = db.query(models.VideoCategory).filter(models.VideoCategory.id == category_id).first()
+    db_category = await db.scalar(select(models.VideoCategory).where(models.VideoCategory.id == category_id))
     if db_category is None:
         raise HTTPException(status_code=404, detail="Category not found")
     return db_category
 
 
 @router.put("/categories/{category_id}", response_model=schemas.VideoCategory)
-def update_video_category(
+async def update_video_category(
     category_id: int,
     category: schemas.VideoCategoryCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Update a video category"""
-    db_category = db.query(models.VideoCategory).filter(models.VideoCategory.id == category_id).first()
+    db_category = await db.scalar(select(models.VideoCategory).where(models.VideoCategory.id == category_id))
     if db_category is None:
         raise HTTPException(status_code=404, detail="Category not found")
     
     for key, value in category.dict().items():
         setattr(db_category, key, value)
     
-    db.commit()
-    db.refresh(db_category)
+    await bump_catalog_version(db, ())
+    await db.commit()
+    await db.refresh(db_category)
     return db_category
 
 
 @router.delete("/categories/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_video_category(
+async def delete_video_category(
     category_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Delete a video category"""
-    db_category = db.query(models.VideoCategory).filter(models.VideoCategory.id == category_id).first()
+    db_category = await db.scalar(select(models.VideoCategory).where(models.VideoCategory.id == category_id))
     if db_category is None:
         raise HTTPException(status_code=404, detail="Category not found")
     
-    db.delete(db_category)
-    db.commit()
+    await db.delete(db_category)
+    await bump_catalog_version(db, ())
+    await db.commit()
     return None
 
 
 # Kemono Import Endpoints
 @router.post("/kemono/import", response_model=schemas.ImportResult)
-def import_kemono_videos(
+async def import_kemono_videos(
     import_request: schemas.KemonoImportRequest,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Import videos from kemono.su"""
-    total, imported, skipped, videos = KemonoService.import_videos(
+    total, imported, skipped, videos = await KemonoService.import_videos(
         db, 
         import_request.creator_id, 
         import_request.service,
@@ -148,7 +195,7 @@ def import_kemono_videos(
     if imported > 0:
         try:
             # Process creators directly 
-            migrate_creators_from_videos(db=db, current_user=current_user)
+            await migrate_creators_from_videos(db=db, current_user=current_user)
             creators_processed = True
         except Exception as e:
             # Log error but don't fail the import
@@ -164,15 +211,15 @@ def import_kemono_videos(
 
 
 @router.get("/kemono/preview/{creator_id}", response_model=Dict[str, List])
-def preview_kemono_videos(
+async def preview_kemono_videos(
     creator_id: str,
     service: str = "patreon",
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Preview videos from kemono.su without importing them"""
-    # Fetch videos from kemono.su
-    raw_videos = KemonoService.fetch_videos(creator_id, service)
+    # Fetch videos from kemono.su (blocking HTTP, so keep it off the event loop)
+    raw_videos = await run_in_threadpool(KemonoService.fetch_videos, creator_id, service)
     
     # Categorize videos
     categorized_videos = KemonoService.categorize_videos(raw_videos)
@@ -186,261 +233,243 @@ def preview_kemono_videos(
 
 
 @router.post("/", response_model=schemas.VideoTutorial, status_code=status.HTTP_201_CREATED)
-def create_video_tutorial(
+async def create_video_tutorial(
     video: schemas.VideoTutorialCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     db_video = models.VideoTutorial(**video.dict())
     db.add(db_video)
-    db.commit()
-    db.refresh(db_video)
+    await db.flush()
+    await bump_catalog_version(db, [db_video.id])
+    await db.commit()
+    await db.refresh(db_video)
     return db_video
 
 
 @router.post("/import", status_code=status.HTTP_201_CREATED)
-def import_videos(
+async def import_videos(
     videos: List[Dict[str, Any]] = Body(...),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
-    """Import multiple videos from JSON data"""
-    created_videos = []
-    for video_data in videos:
-        # Convert data to our schema format
-        video = schemas.VideoTutorialCreate(
-            title=video_data.get("title"),
-            creator=video_data.get("creator"),
-            url=video_data.get("url"),
-            description=video_data.get("description", ""),
-            video_type=video_data.get("video_type", "YouTube"),
-            upload_date=video_data.get("upload_date")
-        )
-        
-        # Create the video in the database
-        db_video = models.VideoTutorial(**video.dict())
-        db.add(db_video)
-        db.commit()
-        db.refresh(db_video)
-        created_videos.append(db_video)
-    
+    """Import multiple videos from JSON data, all or nothing"""
+    # Validate every item before writing any, answering like an invalid request body
+    validated = []
+    errors = []
+    for index, video_data in enumerate(videos):
+        try:
+            # Convert data to our schema format
+            validated.append(schemas.VideoTutorialCreate(
+                title=video_data.get("title"),
+                creator=video_data.get("creator"),
+                url=video_data.get("url"),
+                description=video_data.get("description", ""),
+                video_type=video_data.get("video_type", "YouTube"),
+                upload_date=video_data.get("upload_date")
+            ))
+        except ValidationError as e:
+            errors.extend(
+                {**error, "loc": ("body", index, *error["loc"])}
+                for error in e.errors(include_url=False)
+            )
+    if errors:
+        raise RequestValidationError(errors)
+    
+    # One transaction for the whole import
+    created_videos = [models.VideoTutorial(**video.dict()) for video in validated]
+    db.add_all(created_videos)
+    await db.flush()
+    await bump_catalog_version(db, [video.id for video in created_videos])
+    await db.commit()
     return {"message": f"Successfully imported {len(created_videos)} videos"}
 
 
-@router.get("/", response_model=List[schemas.VideoTutorialWithCategory])
-def read_videos(
+@router.get("/", response_model=List[schemas.VideoTutorialWithCategory], dependencies=[Depends(catalog_conditional_get)])
+async def read_videos(
     skip: int = 0,
     limit: int = 100,
     creator: str = None,
     category_id: int = None,
     title: str = None,
     tag: str = None,
+    tags: List[str] = Query(None),
+    tag_match: str = "all",
     creator_name: str = None,
+    fuzzy: bool = False,
     expand: str = None,
-    sort_by: str = "published_date",
+    fields: str = None,
+    sort_by: str = None,
     sort_order: str = "desc",
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    cursor: str = None,
+    response: Response = None,
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """
     Get all videos with optional filtering and sorting.
     
-    - **sort_by**: Field to sort by (published_date, title, last_watched)
+    - **sort_by**: Field to sort by (published_date, title, creator, last_watched, relevance).
+      Defaults to relevance in fuzzy mode and published_date otherwise
     - **sort_order**: 'asc' or 'desc'
+    - **cursor**: Continue after the previous page (value of its X-Next-Cursor header); replaces skip
     - **title**: Filter by title (partial match)
     - **tag**: Filter by tag
+    - **tags**: Filter by several tags (combined with tag)
+    - **tag_match**: 'all' (default) to require every tag, 'any' for at least one
     - **creator**: Filter by creator name (legacy field)
     - **creator_name**: Filter by creator name (using creator_obj relationship)
+    - **fuzzy**: Match title and creator_name approximately, tolerating typos ("midgam cours"),
+      with relevance being how similar they are
     - **expand**: Comma-separated list of related data to include ('creator', 'progress')
+    - **fields**: Comma-separated list of fields to return (e.g. 'title,url,published_date,category');
+      id is always included and the rest are neither loaded nor sent
     """
-    query = db.query(models.VideoTutorial)
+    expand_options = expand.split(',') if expand else []
+    wanted_fields = parse_fields(fields)
+    with_progress_data = 'progress' in expand_options and (
+        wanted_fields is None or 'progress_data' in wanted_fields
+    )
+    wanted_tags = ([tag] if tag else []) + (tags or [])
+    
+    # With CATALOG_SNAPSHOT on, filter and sort in memory instead
+    if can_serve_from_snapshot(title, creator_name, fuzzy, sort_by):
+        videos = await read_snapshot_videos(
+            db, response, current_user.id, creator, category_id, title, wanted_tags, tag_match,
+            creator_name, with_progress_data or sort_by == "last_watched",
+            sort_by or "published_date", sort_order, skip, limit, cursor
+        )
+        return video_list_response(videos, response, wanted_fields)
+    
+    # The user's progress is joined into the same query when it is returned or sorted on
+    query, progress = video_list_query(
+        current_user.id, with_progress_data or sort_by == "last_watched", wanted_fields
+    )
+    similarity = []
     
     # Apply filters
     if creator:
-        query = query.filter(models.VideoTutorial.creator == creator)
+        query = query.where(models.VideoTutorial.creator == creator)
     
     if category_id:
-        query = query.filter(models.VideoTutorial.category_id == category_id)
+        query = query.where(models.VideoTutorial.category_id == category_id)
     
+    # title and creator_name are served by trigram indexes, both as substrings and fuzzily
     if title:
-        query = query.filter(models.VideoTutorial.title.ilike(f'%{title}%'))
+        if fuzzy:
+            query = query.where(fuzzy_match(models.VideoTutorial.title, title))
+            similarity.append(fuzzy_rank(models.VideoTutorial.title, title))
+        else:
+            query = query.where(models.VideoTutorial.title.ilike(f'%{title}%'))
     
-    if tag:
-        query = query.filter(models.VideoTutorial.tags.contains([tag]))
+    if wanted_tags:
+        query = query.where(video_tags_filter(wanted_tags, tag_match))
     
     if creator_name:
-        query = query.join(models.Creator).filter(models.Creator.name.ilike(f'%{creator_name}%'))
-    
-    # Join with category and creator if needed
-    expand_options = expand.split(',') if expand else []
-    
-    if 'creator' in expand_options or not expand:
-        query = query.options(joinedload(models.VideoTutorial.creator_obj))
-        
-    if 'category' in expand_options or not expand:
-        query = query.options(joinedload(models.VideoTutorial.category))
-    
-    # Apply sorting
-    if sort_by:
-        sort_field = None
-        last_watched_sort = False  # Initialize this flag
-        
-        if sort_by == "title":
-            sort_field = models.VideoTutorial.title
-        elif sort_by == "creator":
-            sort_field = models.VideoTutorial.creator
-        elif sort_by == "published_date":
-            sort_field = models.VideoTutorial.published_date
-        elif sort_by == "last_watched":
-            # We can't sort by last_watched directly in the main query
-            # So we'll use a different approach after fetching the data
-            last_watched_sort = True
+        query = query.join(models.Creator)
+        if fuzzy:
+            query = query.where(fuzzy_match(models.Creator.name, creator_name))
+            similarity.append(fuzzy_rank(models.Creator.name, creator_name))
         else:
-            # Default to sorting by id if an invalid sort field is provided
-            sort_field = models.VideoTutorial.id
-        
-        # Only apply the sort if we have a valid sort field and we're not sorting by last_watched
-        if sort_field and not last_watched_sort:
-            if sort_order.lower() == "asc":
-                query = query.order_by(sort_field.asc())
-            else:
-                query = query.order_by(sort_field.desc())
-    
-    videos = query.offset(skip).limit(limit).all()
-    
-    # If progress information is requested OR we need to sort by last_watched
-    if 'progress' in expand_options or sort_by == "last_watched":
-        # Get all video IDs
-        video_ids = [video.id for video in videos]
-        
-        # Fetch progress for these videos for the current user
-        progress_records = db.query(models.VideoProgress).filter(
-            models.VideoProgress.video_id.in_(video_ids),
-            models.VideoProgress.user_id == current_user.id
-        ).all()
-        
-        # Create a mapping from video_id to progress
-        progress_map = {p.video_id: p for p in progress_records}
-        
-        # Attach progress to each video
-        for video in videos:
-            progress = progress_map.get(video.id)
-            if progress:
-                # Create a dictionary with both backend and frontend field names
-                progress_dict = {
-                    "id": progress.id,
-                    "last_watched": progress.last_watched,
-                    "user_id": progress.user_id,
-                    "video_id": progress.video_id,
-                    "is_watched": progress.is_watched,
-                    "watch_progress": progress.watch_progress,
-                    "personal_notes": progress.personal_notes,
-                    "is_bookmarked": progress.is_bookmarked,
-                    # Frontend compatibility fields
-                    "notes": progress.personal_notes,
-                    "position_seconds": progress.watch_progress,
-                    "is_completed": progress.is_watched
-                }
-                # Use a different attribute name to avoid conflict with the relationship
-                setattr(video, "progress_data", progress_dict)
-            else:
-                # For videos without progress, set an empty progress_data with default values
-                setattr(video, "progress_data", {
-                    "last_watched": None,
-                    "is_watched": False,
-                    "watch_progress": 0,
-                    "personal_notes": "",
-                    "is_bookmarked": False,
-                    # Frontend compatibility fields
-                    "notes": "",
-                    "position_seconds": 0,
-                    "is_completed": False
-                })
-        
-        # If we need to sort by last_watched, do it after attaching progress
-        if sort_by == "last_watched":
-            def get_last_watched_timestamp(video):
-                # For videos with progress data and last_watched timestamp
-                if hasattr(video, "progress_data") and video.progress_data.get("last_watched"):
-                    return video.progress_data["last_watched"] or datetime(1900, 1, 1)
-                # For videos without progress or haven't been watched
-                return datetime(1900, 1, 1)  # Use a very old date for sorting
-            
-            # Sort all videos by the last_watched timestamp
-            videos.sort(
-                key=get_last_watched_timestamp,
-                reverse=(sort_order.lower() == "desc")
-            )
-    
-    return videos
+            query = query.where(models.Creator.name.ilike(f'%{creator_name}%'))
+    
+    # In fuzzy mode, relevance is how similar the title and creator name are
+    relevance = None
+    for rank in similarity:
+        relevance = rank if relevance is None else relevance + rank
+    if sort_by is None:
+        sort_by = "relevance" if relevance is not None else "published_date"
+    
+    # Apply sorting and pagination
+    videos = await fetch_video_page(
+        db, query, progress, response, sort_by, sort_order, skip, limit, cursor,
+        relevance=relevance,
+        fields=wanted_fields
+    )
+    return video_list_response(videos, response, wanted_fields)
 
 
-@router.get("/{video_id}", response_model=schemas.VideoTutorialWithCategory)
-def read_video(
+@router.get("/{video_id}", response_model=schemas.VideoTutorialWithCategory, dependencies=[Depends(catalog_conditional_get)])
+async def read_video(
     video_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
-    db_video = db.query(models.VideoTutorial).filter(models.VideoTutorial.id == video_id).first()
+    db_video = await db.scalar(
+        select(models.VideoTutorial)
+        .where(models.VideoTutorial.id == video_id)
+        .options(
+            joinedload(models.VideoTutorial.category),
+            joinedload(models.VideoTutorial.creator_obj)
+        )
+    )
     if db_video is None:
         raise HTTPException(status_code=404, detail="Video not found")
     return db_video
 
 
+@router.get("/{video_id}/bundle", response_model=schemas.VideoDetailBundle)
+async def read_video_bundle(
+    video_id: int,
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
+):
+    """
+    Everything the video player page shows in one call: the video with its category and
+    creator, the current user's progress (null if none yet) and the previous and next
+    episodes in the same category (by published date).
+    """
+    bundle = await load_video_bundle(db, video_id, current_user.id)
+    if bundle is None:
+        raise HTTPException(status_code=404, detail="Video not found")
+    return bundle
+
+
 @router.put("/{video_id}", response_model=schemas.VideoTutorial)
-def update_video(
+async def update_video(
     video_id: int,
     video: schemas.VideoTutorialCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Update a video"""
-    db_video = db.query(models.VideoTutorial).filter(models.VideoTutorial.id == video_id).first()
+    db_video = await db.scalar(select(models.VideoTutorial).where(models.VideoTutorial.id == video_id))
     if db_video is None:
         raise HTTPException(status_code=404, detail="Video not found")
     
     for key, value in video.dict().items():
         setattr(db_video, key, value)
     
-    db.commit()
-    db.refresh(db_video)
+    await bump_catalog_version(db, [video_id])
+    await db.commit()
+    await db.refresh(db_video)
     return db_video
 
 
 @router.delete("/{video_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_video(
+async def delete_video(
     video_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Delete a video"""
-    db_video = db.query(models.VideoTutorial).filter(models.VideoTutorial.id == video_id).first()
+    db_video = await db.scalar(select(models.VideoTutorial).where(models.VideoTutorial.id == video_id))
     if db_video is None:
         raise HTTPException(status_code=404, detail="Video not found")
     
-    db.delete(db_video)
-    db.commit()
+    await db.delete(db_video)
+    await bump_catalog_version(db, [video_id])
+    await db.commit()
     return None
 
 
 @router.post("/{video_id}/progress", response_model=schemas.VideoProgress)
-def update_video_progress(
+async def update_video_progress(
     video_id: int,
     progress: schemas.VideoProgressBase,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
-    # Check if video exists
-    db_video = db.query(models.VideoTutorial).filter(models.VideoTutorial.id == video_id).first()
-    if db_video is None:
-        raise HTTPException(status_code=404, detail="Video not found")
-    
-    # Check if progress record exists
-    db_progress = db.query(models.VideoProgress).filter(
-        models.VideoProgress.video_id == video_id,
-        models.VideoProgress.user_id == current_user.id
-    ).first()
-    
     # Convert to dict and handle field mappings
     progress_dict = {}
     
@@ -462,22 +491,37 @@ def update_video_progress(
     if progress.is_bookmarked is not None:
         progress_dict["is_bookmarked"] = progress.is_bookmarked
     
-    if db_progress:
-        # Update existing progress
-        for key, value in progress_dict.items():
-            setattr(db_progress, key, value)
-        db_progress.last_watched = datetime.utcnow()
-    else:
-        # Create new progress record
-        db_progress = models.VideoProgress(
-            **progress_dict,
-            video_id=video_id,
-            user_id=current_user.id
-        )
-        db.add(db_progress)
-    
-    db.commit()
-    db.refresh(db_progress)
+    # A buffered heartbeat is older than this write: fold it in. Heartbeats this worker
+    # doesn't hold can't overwrite the write either, see progress_buffer.py
+    pending = take_pending(current_user.id, video_id)
+    if pending is not None:
+        progress_dict.setdefault("watch_progress", pending.position)
+        if pending.completed:
+            progress_dict.setdefault("is_watched", True)
+    
+    progress_dict["last_watched"] = datetime.utcnow()
+    
+    # One statement creates the row or updates the given fields of the existing one,
+    # also when two first saves race each other
+    insert_progress = pg_insert(models.VideoProgress).values(
+        **progress_dict,
+        video_id=video_id,
+        user_id=current_user.id
+    )
+    upsert = insert_progress.on_conflict_do_update(
+        index_elements=[models.VideoProgress.user_id, models.VideoProgress.video_id],
+        set_={key: insert_progress.excluded[key] for key in progress_dict}
+    ).returning(models.VideoProgress)
+    try:
+        db_progress = await db.scalar(upsert)
+    except IntegrityError:
+        await db.rollback()
+        # Only the video_id foreign key (no such video) is the client's error; checked on
+        # the video itself since drivers report the violated constraint differently
+        if await db.get(models.VideoTutorial, video_id) is None:
+            raise HTTPException(status_code=404, detail="Video not found")
+        raise
+    await db.commit()
     
     # Create the response
     response = schemas.VideoProgress(
@@ -498,16 +542,39 @@ def update_video_progress(
     return response
 
 
+@router.post("/{video_id}/progress/heartbeat", status_code=status.HTTP_204_NO_CONTENT)
+async def record_progress_heartbeat(
+    video_id: int,
+    heartbeat: schemas.VideoProgressHeartbeat,
+    current_user: schemas.User = Depends(auth.get_current_active_user)
+):
+    """
+    Report the playback position while a video plays. Heartbeats are buffered and the
+    latest one per video is written within PROGRESS_FLUSH_INTERVAL_SECONDS; 'pause' and
+    'complete' (which also marks the video watched) are written before responding.
+    Use POST /videos/{video_id}/progress for notes, bookmarks and other changes.
+
+    Takes no request session, so heartbeats don't pin the client's reads to the primary.
+    """
+    record_heartbeat(
+        current_user.id, video_id, heartbeat.position_seconds, completed=heartbeat.event == "complete"
+    )
+    if heartbeat.event != "playing":
+        await flush_heartbeat(current_user.id, video_id)
+    elif buffer_full():
+        await flush_progress()
+
+
 @router.get("/progress/{video_id}", response_model=schemas.VideoProgress)
-def get_video_progress(
+async def get_video_progress(
     video_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
-    db_progress = db.query(models.VideoProgress).filter(
+    db_progress = await db.scalar(select(models.VideoProgress).where(
         models.VideoProgress.video_id == video_id,
         models.VideoProgress.user_id == current_user.id
-    ).first()
+    ))
     
     if db_progress is None:
         raise HTTPException(status_code=404, detail="Video progress not found")
@@ -532,68 +599,69 @@ def get_video_progress(
 
 
 # Add these new endpoints for the creators
-@router.get("/creators/", response_model=List[schemas.Creator])
-def get_creators(
+@router.get("/creators/", response_model=List[schemas.Creator], dependencies=[Depends(catalog_conditional_get)])
+async def get_creators(
     skip: int = 0, 
     limit: int = 100, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Get all creator entries"""
-    creators = db.query(models.Creator).offset(skip).limit(limit).all()
+    creators = (await db.scalars(select(models.Creator).offset(skip).limit(limit))).all()
     return creators
 
 
 @router.post("/creators/", response_model=schemas.Creator, status_code=status.HTTP_201_CREATED)
-def create_creator(
+async def create_creator(
     creator: schemas.CreatorCreate, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Create a new creator"""
     # Check if creator with this name already exists
-    db_creator = db.query(models.Creator).filter(models.Creator.name == creator.name).first()
+    db_creator = await db.scalar(select(models.Creator).where(models.Creator.name == creator.name))
     if db_creator:
         raise HTTPException(status_code=400, detail="Creator with this name already exists")
     
     # Create new creator
     db_creator = models.Creator(**creator.dict())
     db.add(db_creator)
-    db.commit()
-    db.refresh(db_creator)
+    await bump_catalog_version(db, ())
+    await db.commit()
+    await db.refresh(db_creator)
     return db_creator
 
 
-@router.get("/creators/{creator_id}", response_model=schemas.Creator)
-def get_creator(
+@router.get("/creators/{creator_id}", response_model=schemas.Creator, dependencies=[Depends(catalog_conditional_get)])
+async def get_creator(
     creator_id: int, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Get a specific creator by ID"""
-    creator = db.query(models.Creator).filter(models.Creator.id == creator_id).first()
+    creator = await db.scalar(select(models.Creator).where(models.Creator.id == creator_id))
     if creator is None:
         raise HTTPException(status_code=404, detail="Creator not found")
     return creator
 
 
 @router.put("/creators/{creator_id}", response_model=schemas.Creator)
-def update_creator(
+async def update_creator(
     creator_id: int, 
     creator_update: schemas.CreatorCreate, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Update a creator"""
-    db_creator = db.query(models.Creator).filter(models.Creator.id == creator_id).first()
+    db_creator = await db.scalar(select(models.Creator).where(models.Creator.id == creator_id))
     if db_creator is None:
         raise HTTPException(status_code=404, detail="Creator not found")
     
     # Check if updating to a name that already exists
-    existing = db.query(models.Creator).filter(
+    existing = await db.scalar(select(models.Creator).where(
         models.Creator.name == creator_update.name,
         models.Creator.id != creator_id
-    ).first()
+    ))
     if existing:
         raise HTTPException(status_code=400, detail="Creator with this name already exists")
     
@@ -604,40 +672,40 @@ def update_creator(
     for key, value in creator_update.dict().items():
         setattr(db_creator, key, value)
     
-    db.commit()
-    db.refresh(db_creator)
-    
     # If the name changed, update all videos associated with this creator
+    videos = []
     if old_name != creator_update.name:
         # Update videos by creator_relation_id
-        videos = db.query(models.VideoTutorial).filter(
+        videos = (await db.scalars(select(models.VideoTutorial).where(
             models.VideoTutorial.creator_relation_id == creator_id
-        ).all()
+        ))).all()
         
         for video in videos:
             video.creator = creator_update.name
-        
-        db.commit()
     
+    # The creator, its videos and the catalog version in one transaction
+    await bump_catalog_version(db, [video.id for video in videos])
+    await db.commit()
+    await db.refresh(db_creator)
     return db_creator
 
 
 @router.delete("/creators/{creator_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_creator(
+async def delete_creator(
     creator_id: int, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Delete a creator"""
     # Check if creator exists
-    db_creator = db.query(models.Creator).filter(models.Creator.id == creator_id).first()
+    db_creator = await db.scalar(select(models.Creator).where(models.Creator.id == creator_id))
     if db_creator is None:
         raise HTTPException(status_code=404, detail="Creator not found")
     
     # Check if creator is used in any videos
-    videos_with_creator = db.query(models.VideoTutorial).filter(
+    videos_with_creator = await db.scalar(select(func.count(models.VideoTutorial.id)).where(
         models.VideoTutorial.creator_relation_id == creator_id
-    ).count()
+    ))
     
     if videos_with_creator > 0:
         raise HTTPException(
@@ -646,43 +714,44 @@ def delete_creator(
         )
     
     # Delete creator
-    db.delete(db_creator)
-    db.commit()
+    await db.delete(db_creator)
+    await bump_catalog_version(db, ())
+    await db.commit()
     return None
 
 
-@router.get("/creators/{creator_id}/videos", response_model=List[schemas.VideoTutorial])
-def get_creator_videos(
+@router.get("/creators/{creator_id}/videos", response_model=List[schemas.VideoTutorial], dependencies=[Depends(catalog_conditional_get)])
+async def get_creator_videos(
     creator_id: int, 
     skip: int = 0, 
     limit: int = 100, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Get all videos by a specific creator"""
-    videos = db.query(models.VideoTutorial).filter(
+    videos = (await db.scalars(select(models.VideoTutorial).where(
         models.VideoTutorial.creator_relation_id == creator_id
-    ).offset(skip).limit(limit).all()
+    ).offset(skip).limit(limit))).all()
     
     return videos
 
 
 # Add endpoint to associate creator with video
 @router.put("/{video_id}/set-creator/{creator_id}", response_model=schemas.VideoTutorial)
-def set_video_creator(
+async def set_video_creator(
     video_id: int, 
     creator_id: int, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """Associate a creator with a video"""
     # Check if video exists
-    db_video = db.query(models.VideoTutorial).filter(models.VideoTutorial.id == video_id).first()
+    db_video = await db.scalar(select(models.VideoTutorial).where(models.VideoTutorial.id == video_id))
     if db_video is None:
         raise HTTPException(status_code=404, detail="Video not found")
     
     # Check if creator exists
-    db_creator = db.query(models.Creator).filter(models.Creator.id == creator_id).first()
+    db_creator = await db.scalar(select(models.Creator).where(models.Creator.id == creator_id))
     if db_creator is None:
         raise HTTPException(status_code=404, detail="Creator not found")
     
@@ -691,87 +760,88 @@ def set_video_creator(
     # Also update the text field for backwards compatibility
     db_video.creator = db_creator.name
     
-    db.commit()
-    db.refresh(db_video)
+    await bump_catalog_version(db, [video_id])
+    await db.commit()
+    await db.refresh(db_video)
     return db_video
 
 
 @router.post("/creators/migrate-from-videos", response_model=List[schemas.Creator])
-def migrate_creators_from_videos_endpoint(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_admin_user)
+async def migrate_creators_from_videos_endpoint(
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_admin_user)
 ):
     """Create Creator entries for all existing videos"""
-    return migrate_creators_from_videos(db, current_user)
+    return await migrate_creators_from_videos(db, current_user)
 
 
 @router.get("/recently-watched/", response_model=List[schemas.VideoTutorialWithCategory])
-def read_recently_watched_videos(
+async def read_recently_watched_videos(
     skip: int = 0,
     limit: int = 10,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    fields: str = None,
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """
     Get videos recently watched by the current user, ordered by last_watched timestamp.
+    `fields` trims each video as in GET /videos/.
     """
+    wanted_fields = parse_fields(fields)
     # Query videos with their progress, joined through the video_progress table
     query = (
-        db.query(models.VideoTutorial)
+        select(models.VideoTutorial)
         .join(
             models.VideoProgress,
             (models.VideoTutorial.id == models.VideoProgress.video_id) & 
             (models.VideoProgress.user_id == current_user.id)
         )
-        .options(
-            joinedload(models.VideoTutorial.category),
-            joinedload(models.VideoTutorial.creator_obj)
-        )
+        .options(*video_load_options(wanted_fields))
         .order_by(models.VideoProgress.last_watched.desc())
     )
     
-    videos = query.offset(skip).limit(limit).all()
+    videos = (await db.scalars(query.offset(skip).limit(limit))).all()
     
-    return videos
+    return video_list_response(videos, fields=wanted_fields)
 
 
 @router.get("/bookmarked/", response_model=List[schemas.VideoTutorialWithCategory])
-def read_bookmarked_videos(
+async def read_bookmarked_videos(
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    fields: str = None,
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """
-    Get videos bookmarked by the current user.
+    Get videos bookmarked by the current user. `fields` trims each video as in GET /videos/.
     """
+    wanted_fields = parse_fields(fields)
     # Query videos with their progress, joined through the video_progress table
     query = (
-        db.query(models.VideoTutorial)
+        select(models.VideoTutorial)
         .join(
             models.VideoProgress,
             (models.VideoTutorial.id == models.VideoProgress.video_id) & 
             (models.VideoProgress.user_id == current_user.id) &
             (models.VideoProgress.is_bookmarked == True)
         )
-        .options(
-            joinedload(models.VideoTutorial.category),
-            joinedload(models.VideoTutorial.creator_obj)
-        )
+        .options(*video_load_options(wanted_fields))
         .order_by(models.VideoProgress.last_watched.desc())
     )
     
-    videos = query.offset(skip).limit(limit).all()
+    videos = (await db.scalars(query.offset(skip).limit(limit))).all()
     
-    return videos
+    return video_list_response(videos, fields=wanted_fields)
 
 
-@router.get("/search/", response_model=List[schemas.VideoTutorialWithCategory])
-def search_videos(
+@router.get("/search/", response_model=List[schemas.VideoTutorialWithCategory], dependencies=[Depends(catalog_conditional_get)])
+async def search_videos(
     q: str = None,
     creator_id: int = None,
     category_id: int = None,
     tags: List[str] = Query(None),
+    tag_match: str = "all",
     min_published_date: datetime = None,
     max_published_date: datetime = None,
     watched: bool = None,
@@ -779,185 +849,183 @@ def search_videos(
     sort_by: str = "published_date",
     sort_order: str = "desc",
     expand: str = None,
+    fields: str = None,
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_active_user)
+    cursor: str = None,
+    response: Response = None,
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
     """
     Advanced search for videos with multiple filter options.
     
-    - **q**: General search query (searches title and description)
+    - **q**: Full-text search over title, key points and description (last word also matches as a prefix)
     - **creator_id**: Filter by specific creator ID
     - **category_id**: Filter by specific category ID
     - **tags**: Filter by one or more tags
+    - **tag_match**: 'all' (default) to require every tag, 'any' for at least one
     - **min_published_date**: Filter videos published after this date
     - **max_published_date**: Filter videos published before this date
     - **watched**: Filter by watched status
     - **bookmarked**: Filter by bookmarked status
-    - **sort_by**: Field to sort by (published_date, title, last_watched)
+    - **sort_by**: Field to sort by (published_date, title, creator, last_watched, relevance).
+      relevance ranks by how well videos match q and needs q
     - **sort_order**: 'asc' or 'desc'
     - **expand**: Comma-separated list of related data to include ('creator', 'progress')
+    - **fields**: Comma-separated list of fields to return, as in GET /videos/
+    - **cursor**: Continue after the previous page (value of its X-Next-Cursor header); replaces skip
     """
-    # Start with base query
-    query = db.query(models.VideoTutorial)
-    
-    # Parse expand parameter
+    # Parse expand and fields parameters
     expand_options = expand.split(',') if expand else []
+    wanted_fields = parse_fields(fields)
+    
+    # The user's progress is joined into the same query when it is returned, sorted
+    # or filtered on
+    query, progress = video_list_query(
+        current_user.id,
+        'progress' in expand_options and (wanted_fields is None or 'progress_data' in wanted_fields)
+        or sort_by == "last_watched" or watched is not None or bookmarked is not None,
+        wanted_fields
+    )
 
-    # Apply text search if provided
-    if q:
-        search_query = f"%{q}%"
-        query = query.filter(
-            or_(
-                models.VideoTutorial.title.ilike(search_query),
-                models.VideoTutorial.description.ilike(search_query)
-            )
-        )
+    # Full-text search if provided
+    ts_query = video_search_query(q) if q else None
+    if ts_query is None and sort_by == "relevance":
+        # Nothing to rank against
+        sort_by = "published_date"
+    
+    query = filter_video_search(
+        query, progress, ts_query, creator_id, category_id, tags, tag_match,
+        min_published_date, max_published_date, watched, bookmarked
+    )
     
-    # Apply specific filters
-    if creator_id:
-        query = query.filter(models.VideoTutorial.creator_relation_id == creator_id)
+    # Apply sorting and pagination
+    videos = await fetch_video_page(
+        db, query, progress, response, sort_by, sort_order, skip, limit, cursor,
+        relevance=video_search_rank(ts_query) if ts_query is not None else None,
+        fields=wanted_fields
+    )
     
-    if category_id:
-        query = query.filter(models.VideoTutorial.category_id == category_id)
-    
-    if tags:
-        for tag in tags:
-            # For PostgreSQL JSON array contains
-            query = query.filter(models.VideoTutorial.tags.contains([tag]))
-    
-    if min_published_date:
-        query = query.filter(models.VideoTutorial.published_date >= min_published_date)
-    
-    if max_published_date:
-        query = query.filter(models.VideoTutorial.published_date <= max_published_date)
-    
-    # Apply watched/bookmark filters if requested
-    if watched is not None or bookmarked is not None:
-        # We need to join with video_progress for these filters
-        progress_join_conditions = [
-            models.VideoTutorial.id == models.VideoProgress.video_id,
-            models.VideoProgress.user_id == current_user.id
-        ]
-        
-        query = query.join(
-            models.VideoProgress,
-            and_(*progress_join_conditions)
-        )
-        
-        if watched is not None:
-            query = query.filter(models.VideoProgress.is_watched == watched)
-        
-        if bookmarked is not None:
-            query = query.filter(models.VideoProgress.is_bookmarked == bookmarked)
+    # Highlight where the query matched
+    if ts_query is not None and (wanted_fields is None or 'search_snippet' in wanted_fields):
+        snippets = await load_search_snippets(db, ts_query, [video.id for video in videos])
+        for video in videos:
+            video.search_snippet = snippets.get(video.id)
     
-    # Apply sorting
-    if sort_by:
-        sort_field = None
-        last_watched_sort = False  # Initialize this flag
-        
-        if sort_by == "title":
-            sort_field = models.VideoTutorial.title
-        elif sort_by == "creator":
-            sort_field = models.VideoTutorial.creator
-        elif sort_by == "published_date":
-            sort_field = models.VideoTutorial.published_date
-        elif sort_by == "last_watched":
-            # We can't sort by last_watched directly in the main query
-            # So we'll use a different approach after fetching the data
-            last_watched_sort = True
-        else:
-            # Default to sorting by id if an invalid sort field is provided
-            sort_field = models.VideoTutorial.id
-        
-        # Only apply the sort if we have a valid sort field and we're not sorting by last_watched
-        if sort_field and not last_watched_sort:
-            if sort_order.lower() == "asc":
-                query = query.order_by(sort_field.asc())
-            else:
-                query = query.order_by(sort_field.desc())
-    
-    # Apply eager loading
-    query = query.options(
-        joinedload(models.VideoTutorial.category),
-        joinedload(models.VideoTutorial.creator_obj)
+    return video_list_response(videos, response, wanted_fields)
+
+
+@router.get("/export/", response_class=StreamingResponse)
+async def export_videos(
+    request: Request,
+    q: str = None,
+    creator_id: int = None,
+    category_id: int = None,
+    tags: List[str] = Query(None),
+    tag_match: str = "all",
+    min_published_date: datetime = None,
+    max_published_date: datetime = None,
+    watched: bool = None,
+    bookmarked: bool = None,
+    fields: str = None,
+    current_user: schemas.User = Depends(auth.get_current_active_user)
+):
+    """
+    Every video matching the /videos/search/ filters as NDJSON (application/x-ndjson), one
+    video with the user's progress_data per line, in id order, in a single streamed
+    response. `fields` trims each line as in GET /videos/. Sent gzip-compressed when the
+    client accepts it (Accept-Encoding: gzip).
+    """
+    wanted_fields = parse_fields(fields)
+    query, progress = video_list_query(
+        current_user.id,
+        wanted_fields is None or 'progress_data' in wanted_fields
+        or watched is not None or bookmarked is not None,
+        wanted_fields
+    )
+    query = filter_video_search(
+        query, progress, video_search_query(q) if q else None, creator_id, category_id, tags,
+        tag_match, min_published_date, max_published_date, watched, bookmarked
     )
     
-    # Apply pagination
-    videos = query.offset(skip).limit(limit).all()
-    
-    # If progress information is requested OR we need to sort by last_watched
-    if 'progress' in expand_options or sort_by == "last_watched":
-        # Get all video IDs
-        video_ids = [video.id for video in videos]
-        
-        # Fetch progress for these videos for the current user
-        progress_records = db.query(models.VideoProgress).filter(
-            models.VideoProgress.video_id.in_(video_ids),
-            models.VideoProgress.user_id == current_user.id
-        ).all()
-        
-        # Create a mapping from video_id to progress
-        progress_map = {p.video_id: p for p in progress_records}
-        
-        # Attach progress to each video
-        for video in videos:
-            progress = progress_map.get(video.id)
-            if progress:
-                # Create a dictionary with both backend and frontend field names
-                progress_dict = {
-                    "id": progress.id,
-                    "last_watched": progress.last_watched,
-                    "user_id": progress.user_id,
-                    "video_id": progress.video_id,
-                    "is_watched": progress.is_watched,
-                    "watch_progress": progress.watch_progress,
-                    "personal_notes": progress.personal_notes,
-                    "is_bookmarked": progress.is_bookmarked,
-                    # Frontend compatibility fields
-                    "notes": progress.personal_notes,
-                    "position_seconds": progress.watch_progress,
-                    "is_completed": progress.is_watched
-                }
-                # Use a different attribute name to avoid conflict with the relationship
-                setattr(video, "progress_data", progress_dict)
-            else:
-                # For videos without progress, set an empty progress_data with default values
-                setattr(video, "progress_data", {
-                    "last_watched": None,
-                    "is_watched": False,
-                    "watch_progress": 0,
-                    "personal_notes": "",
-                    "is_bookmarked": False,
-                    # Frontend compatibility fields
-                    "notes": "",
-                    "position_seconds": 0,
-                    "is_completed": False
-                })
-        
-        # If we need to sort by last_watched, do it after attaching progress
-        if sort_by == "last_watched":
-            def get_last_watched_timestamp(video):
-                # For videos with progress data and last_watched timestamp
-                if hasattr(video, "progress_data") and video.progress_data.get("last_watched"):
-                    return video.progress_data["last_watched"] or datetime(1900, 1, 1)
-                # For videos without progress or haven't been watched
-                return datetime(1900, 1, 1)  # Use a very old date for sorting
-            
-            # Sort all videos by the last_watched timestamp
-            videos.sort(
-                key=get_last_watched_timestamp,
-                reverse=(sort_order.lower() == "desc")
-            )
+    compress = accepts_gzip(request.headers.get("accept-encoding", ""))
+    headers = {"Vary": "Accept-Encoding"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        stream_video_export(routed_session_factory(request), query, progress, wanted_fields, compress),
+        media_type="application/x-ndjson",
+        headers=headers
+    )
+
+
+@router.get("/facets/", response_model=schemas.VideoFacets)
+async def read_video_facets(
+    q: str = None,
+    creator_id: int = None,
+    category_id: int = None,
+    tags: List[str] = Query(None),
+    tag_match: str = "all",
+    min_published_date: datetime = None,
+    max_published_date: datetime = None,
+    watched: bool = None,
+    bookmarked: bool = None,
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
+):
+    """
+    Video counts for the filter sidebar, for the same filters as /videos/search/:
+    per category, creator and tag (most videos first; an id of null counts videos
+    without one), the total, and how many of them the user watched and bookmarked.
+    """
+    return await video_facets(
+        db, current_user.id, q, creator_id, category_id, tags, tag_match,
+        min_published_date, max_published_date, watched, bookmarked
+    )
+
+
+@router.get("/tags/", response_model=List[schemas.TagCount], dependencies=[Depends(catalog_conditional_get)])
+async def read_tag_cloud(
+    category_id: int = None,
+    min_count: int = 1,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
+):
+    """
+    Tags used by videos with how many videos have each, most used first.
+
+    - **category_id**: Only count videos in this category
+    - **min_count**: Leave out tags used by fewer videos
+    """
+    # Non-array tags become NULL inside the call, so they expand to no rows whatever
+    # order the planner evaluates things in (a WHERE on the type doesn't guarantee that)
+    tags = models.VideoTutorial.tags
+    tag = func.jsonb_array_elements_text(
+        case((func.jsonb_typeof(tags) == "array", tags))
+    ).table_valued("value").alias("tag")
+    video_count = func.count().label("count")
+    query = (
+        select(tag.c.value.label("tag"), video_count)
+        .select_from(models.VideoTutorial)
+        .join(tag, true())
+        .group_by(tag.c.value)
+        .having(func.count() >= min_count)
+        .order_by(video_count.desc(), tag.c.value)
+        .limit(limit)
+    )
+    if category_id:
+        query = query.where(models.VideoTutorial.category_id == category_id)
     
-    return videos
+    rows = await db.execute(query)
+    return [{"tag": tag_name, "count": count} for tag_name, count in rows]
 
 
 @router.post("/update-categories", status_code=status.HTTP_200_OK)
-def update_video_categories(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_admin_user)
+async def update_video_categories(
+    db: AsyncSession = Depends(get_routed_db),
+    current_user: schemas.User = Depends(auth.get_current_admin_user)
 ):
     """Update categories for all videos based on their titles (admin only)"""
     # Define title lists for each category
@@ -1021,16 +1089,16 @@ def update_video_categories(
     ]
     
     # Get category IDs
-    fundamentals_category = db.query(models.VideoCategory).filter(models.VideoCategory.name == "Fundamentals").first()
-    early_game_category = db.query(models.VideoCategory).filter(models.VideoCategory.name == "Early Game Course").first()
-    midgame_category = db.query(models.VideoCategory).filter(models.VideoCategory.name == "Midgame Course").first()
-    classes_category = db.query(models.VideoCategory).filter(models.VideoCategory.name == "Classes").first()
-    practical_category = db.query(models.VideoCategory).filter(models.VideoCategory.name == "Practical Course").first()
+    fundamentals_category = await db.scalar(select(models.VideoCategory).where(models.VideoCategory.name == "Fundamentals"))
+    early_game_category = await db.scalar(select(models.VideoCategory).where(models.VideoCategory.name == "Early Game Course"))
+    midgame_category = await db.scalar(select(models.VideoCategory).where(models.VideoCategory.name == "Midgame Course"))
+    classes_category = await db.scalar(select(models.VideoCategory).where(models.VideoCategory.name == "Classes"))
+    practical_category = await db.scalar(select(models.VideoCategory).where(models.VideoCategory.name == "Practical Course"))
     
     # Get all videos without categories
-    videos = db.query(models.VideoTutorial).filter(
+    videos = (await db.scalars(select(models.VideoTutorial).where(
         models.VideoTutorial.category_id.is_(None)
-    ).all()
+    ))).all()
     
     updated_count = 0
     
@@ -1063,7 +1131,8 @@ def update_video_categories(
         if updated:
             updated_count += 1
     
-    db.commit()
+    await bump_catalog_version(db, [video.id for video in videos])
+    await db.commit()
     
     return {
         "message": f"Updated categories for {updated_count} videos",
@@ -37,6 +37,13 @@ class User(UserBase):
     class Config:
         from_attributes = True
 
+    # Rows created before the flags had server defaults can hold NULL, which has
+    # always meant "not set"
+    @field_validator('is_active', 'is_admin', mode='before')
+    @classmethod
+    def validate_flags(cls, v):
+        return bool(v)
+
 
 class UserInDB(User):
     hashed_password: str
@@ -122,6 +129,17 @@ class VideoTutorialCreate(VideoTutorialBase):
     tags: Optional[List[str]] = None
 
 
+def parse_tags(v):
+    # Handle PostgreSQL array format
+    if isinstance(v, str):
+        if v.startswith('{') and v.endswith('}'):
+            # Convert PostgreSQL array syntax to Python list
+            tags = v[1:-1].split(',')
+            return [tag.strip('"\'') for tag in tags]
+        return [v]
+    return v
+
+
 class VideoTutorial(VideoTutorialBase):
     id: int
     upload_date: Optional[datetime] = None
@@ -138,14 +156,27 @@ class VideoTutorial(VideoTutorialBase):
     @field_validator('tags', mode='before')
     @classmethod
     def validate_tags(cls, v):
-        # Handle PostgreSQL array format
-        if isinstance(v, str):
-            if v.startswith('{') and v.endswith('}'):
-                # Convert PostgreSQL array syntax to Python list
-                tags = v[1:-1].split(',')
-                return [tag.strip('"\'') for tag in tags]
-            return [v]
-        return v
+        return parse_tags(v)
+
+
+class TagCount(BaseModel):
+    tag: str
+    count: int
+
+
+class FacetCount(BaseModel):
+    id: Optional[int] = None  # None counts the videos without one
+    name: Optional[str] = None
+    count: int
+
+
+class VideoFacets(BaseModel):
+    total: int
+    categories: List[FacetCount]
+    creators: List[FacetCount]
+    tags: List[TagCount]
+    watched: int
+    bookmarked: int
 
 
 # Extended video tutorial with category
@@ -153,6 +184,7 @@ class VideoTutorialWithCategory(VideoTutorial):
     category: Optional[VideoCategory] = None
     creator_obj: Optional[Creator] = None  # Include creator info
     progress_data: Optional[Dict[str, Any]] = None  # Include progress information if requested
+    search_snippet: Optional[str] = None  # HTML-escaped matched text with <mark> highlights, when searching with q
 
     class Config:
         from_attributes = True
@@ -182,6 +214,12 @@ class VideoProgressCreate(VideoProgressBase):
     video_id: int
 
 
+class VideoProgressHeartbeat(BaseModel):
+    position_seconds: float
+    # 'playing' is buffered; 'pause' and 'complete' are written before the response
+    event: Literal["playing", "pause", "complete"] = "playing"
+
+
 class VideoProgress(VideoProgressBase):
     id: int
     last_watched: datetime
@@ -194,6 +232,23 @@ class VideoProgress(VideoProgressBase):
         populate_by_name = True
 
 
+# Video player page: the video with everything the page shows, in one response
+class VideoEpisode(BaseModel):
+    id: int
+    title: str
+    published_date: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class VideoDetailBundle(BaseModel):
+    video: VideoTutorialWithCategory
+    progress: Optional[VideoProgress] = None  # None until the user first saves progress
+    previous_episode: Optional[VideoEpisode] = None  # Neighbours in the video's category
+    next_episode: Optional[VideoEpisode] = None
+
+
 # Kemono Import schemas
 class KemonoImportRequest(BaseModel):
     creator_id: str
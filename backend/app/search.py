@@ -0,0 +1,96 @@
+import html
+import json
+import re
+from typing import Dict, List, Optional
+
+from sqlalchemy import cast, func, literal, select
+from sqlalchemy.dialects.postgresql import JSONPATH
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+
+# Full-text search over video_tutorials.search_vector (see models.VIDEO_SEARCH_VECTOR),
+# trigram (pg_trgm) fuzzy matching of titles and names, and tag containment. All of
+# them go through GIN indexes instead of scanning every row.
+
+# ts_headline marks matches with these private-use characters; the snippet is then
+# HTML-escaped and they become <mark></mark>, since key points hold scraped HTML
+SNIPPET_START, SNIPPET_STOP = "\ue000", "\ue001"
+SNIPPET_OPTIONS = f"StartSel={SNIPPET_START}, StopSel={SNIPPET_STOP}, MinWords=10, MaxWords=30, MaxFragments=2"
+
+
+def video_search_query(q: str):
+    """
+    tsquery for free text typed into the search box: every word must match, and the
+    last one also matches as a prefix so results show up while the user is typing.
+    Returns None if q has no searchable words.
+    """
+    words = re.findall(r"\w+", q.lower())
+    if not words:
+        return None
+    terms = [f"'{word}'" for word in words]
+    terms[-1] += ":*"
+    return func.to_tsquery(models.SEARCH_CONFIG, " & ".join(terms))
+
+
+def video_search_filter(ts_query):
+    return models.VideoTutorial.search_vector.op("@@")(ts_query)
+
+
+def video_search_rank(ts_query):
+    """Relevance of a video to the query, weighted by where the words matched"""
+    return func.ts_rank_cd(models.VideoTutorial.search_vector, ts_query)
+
+
+def fuzzy_match(column, text: str):
+    """
+    Typo-tolerant match of text against a column with a pg_trgm index: true when some
+    run of words in the column is similar enough to text (word_similarity above
+    pg_trgm.word_similarity_threshold, 0.6 by default), e.g. "midgam cours" finds
+    "Midgame course episode 3". Written as `column %> text` so the GIN index is used.
+    """
+    return column.op("%>")(text)
+
+
+def fuzzy_rank(column, text: str):
+    return func.word_similarity(text, column)
+
+
+def video_tags_filter(tags: List[str], match: str = "all"):
+    """
+    One indexable (jsonb_path_ops) condition for a set of tags: `tags @> '["a", "b"]'`
+    when videos need all of them, `tags @@ '$[*] == "a" || $[*] == "b"'` when any will do.
+    """
+    if match == "any" and len(tags) > 1:
+        path = " || ".join(f"$[*] == {json.dumps(tag)}" for tag in tags)
+        return models.VideoTutorial.tags.op("@@")(cast(literal(path), JSONPATH))
+    return models.VideoTutorial.tags.contains(tags)
+
+
+async def load_search_snippets(db: AsyncSession, ts_query, video_ids: List[int]) -> Dict[int, Optional[str]]:
+    """
+    Highlighted fragments of key points / description around the matched words, by video id.
+
+    ts_headline re-parses the text, so it only runs for the page being returned. The text is
+    HTML-escaped and matches are wrapped in <mark></mark>.
+    """
+    if not video_ids:
+        return {}
+    document = func.concat_ws(" ... ", models.VideoTutorial.key_points, models.VideoTutorial.description)
+    rows = await db.execute(
+        select(
+            models.VideoTutorial.id,
+            func.ts_headline(models.SEARCH_CONFIG, document, ts_query, SNIPPET_OPTIONS),
+        ).where(models.VideoTutorial.id.in_(video_ids))
+    )
+    return {video_id: _highlight(snippet) for video_id, snippet in rows}
+
+
+def _highlight(snippet: Optional[str]) -> Optional[str]:
+    if not snippet:
+        return None
+    return (
+        html.escape(snippet)
+        .replace(SNIPPET_START, "<mark>")
+        .replace(SNIPPET_STOP, "</mark>")
+    )
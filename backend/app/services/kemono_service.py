@@ -2,9 +2,12 @@ import requests
 import json
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
 from .. import models, schemas
+from ..catalog import bump_catalog_version
 
 # Helper class to handle Kemono.su API integration
 class KemonoService:
@@ -178,11 +181,11 @@ class KemonoService:
         return processed
     
     @staticmethod
-    def import_videos(db: Session, creator_id: str, service: str = "patreon", 
-                     category_mapping: Optional[Dict[str, int]] = None) -> Tuple[int, int, int, List[models.VideoTutorial]]:
+    async def import_videos(db: AsyncSession, creator_id: str, service: str = "patreon", 
+                            category_mapping: Optional[Dict[str, int]] = None) -> Tuple[int, int, int, List[models.VideoTutorial]]:
         """Import videos from kemono.su into the database"""
-        # Fetch videos
-        raw_videos = KemonoService.fetch_videos(creator_id, service)
+        # Fetch videos (blocking HTTP, so run it in the threadpool)
+        raw_videos = await run_in_threadpool(KemonoService.fetch_videos, creator_id, service)
         total_videos = len(raw_videos)
         
         # Process videos
@@ -249,17 +252,23 @@ class KemonoService:
             "How to play mechanically well and predict enemy spells | Practical course - Episode 1"
         ]
         
+        # Load the known categories once instead of once per video
+        categories_by_name = {
+            category.name: category
+            for category in (await db.scalars(select(models.VideoCategory).where(models.VideoCategory.name.in_([
+                "Fundamentals", "Early Game Course", "Midgame Course", "Classes", "Practical Course"
+            ])))).all()
+        }
+        fundamentals_category = categories_by_name.get("Fundamentals")
+        early_game_category = categories_by_name.get("Early Game Course")
+        midgame_category = categories_by_name.get("Midgame Course")
+        classes_category = categories_by_name.get("Classes")
+        practical_category = categories_by_name.get("Practical Course")
+        
         # Get category IDs from database if not provided
         if not category_mapping:
             category_mapping = {}
             
-            # Try to find category IDs by name
-            fundamentals_category = db.query(models.VideoCategory).filter(models.VideoCategory.name == "Fundamentals").first()
-            early_game_category = db.query(models.VideoCategory).filter(models.VideoCategory.name == "Early Game Course").first()
-            midgame_category = db.query(models.VideoCategory).filter(models.VideoCategory.name == "Midgame Course").first()
-            classes_category = db.query(models.VideoCategory).filter(models.VideoCategory.name == "Classes").first()
-            practical_category = db.query(models.VideoCategory).filter(models.VideoCategory.name == "Practical Course").first()
-            
             # Create title-to-category mappings
             if fundamentals_category:
                 for title in fundamental_titles:
@@ -281,24 +290,27 @@ class KemonoService:
                 for title in practical_course_titles:
                     category_mapping[title.lower()] = practical_category.id
             
-        for raw_video in raw_videos:
-            # Process video data
-            processed = KemonoService.process_video(raw_video)
-            
+        # Process all videos up front so existing ones can be found with a single query
+        processed_videos = [KemonoService.process_video(raw_video) for raw_video in raw_videos]
+        titles = {processed["title"] for processed in processed_videos if processed["url"]}
+        existing_videos = set()
+        if titles:
+            existing_videos = set((await db.execute(
+                select(models.VideoTutorial.title, models.VideoTutorial.url)
+                .where(models.VideoTutorial.title.in_(titles))
+            )).all())
+        
+        for processed in processed_videos:
             # Skip videos without URLs
             if not processed["url"]:
                 skipped_count += 1
                 continue
                 
-            # Try to find an existing video with the same title and URL to avoid duplicates
-            existing = db.query(models.VideoTutorial).filter(
-                models.VideoTutorial.title == processed["title"],
-                models.VideoTutorial.url == processed["url"]
-            ).first()
-            
-            if existing:
+            # Skip videos with the same title and URL to avoid duplicates
+            if (processed["title"], processed["url"]) in existing_videos:
                 skipped_count += 1
                 continue
+            existing_videos.add((processed["title"], processed["url"]))
             
             # Determine category_id based on title
             category_id = None
@@ -317,23 +329,18 @@ class KemonoService:
                 # If still no match, try additional pattern matching
                 if category_id is None:
                     if any(ft.lower() in video_title for ft in fundamental_titles):
-                        fundamentals_category = db.query(models.VideoCategory).filter(models.VideoCategory.name == "Fundamentals").first()
                         if fundamentals_category:
                             category_id = fundamentals_category.id
                     elif "early game" in video_title or "early-game" in video_title:
-                        early_game_category = db.query(models.VideoCategory).filter(models.VideoCategory.name == "Early Game Course").first()
                         if early_game_category:
                             category_id = early_game_category.id
                     elif "midgame" in video_title or "mid game" in video_title or "mid-game" in video_title:
-                        midgame_category = db.query(models.VideoCategory).filter(models.VideoCategory.name == "Midgame Course").first()
                         if midgame_category:
                             category_id = midgame_category.id
                     elif "class" in video_title:
-                        classes_category = db.query(models.VideoCategory).filter(models.VideoCategory.name == "Classes").first()
                         if classes_category:
                             category_id = classes_category.id
                     elif "practical" in video_title:
-                        practical_category = db.query(models.VideoCategory).filter(models.VideoCategory.name == "Practical Course").first()
                         if practical_category:
                             category_id = practical_category.id
             
@@ -368,10 +375,13 @@ class KemonoService:
             )
             
             db.add(video)
-            db.commit()
-            db.refresh(video)
-            
             imported_videos.append(video)
             imported_count += 1
         
+        # One transaction for the whole import, with the catalog version; ids are
+        # assigned on flush
+        await db.flush()
+        await bump_catalog_version(db, [video.id for video in imported_videos])
+        await db.commit()
+        
         return total_videos, imported_count, skipped_count, imported_videos 
\ No newline at end of file
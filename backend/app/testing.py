@@ -0,0 +1,75 @@
+"""
+Pytest helpers for keeping the number of SQL statements per endpoint in check.
+
+Enable them in a conftest.py with:
+
+    pytest_plugins = ["app.testing"]
+
+and declare a budget either for a block:
+
+    def test_list_pools(client, query_budget):
+        with query_budget(2):
+            client.get("/champion-pools/")
+
+or for a whole test:
+
+    @max_queries(3)
+    def test_read_videos(client):
+        client.get("/videos/")
+"""
+import functools
+import inspect
+from contextlib import contextmanager
+
+import pytest
+
+from .database import engine, async_engine, replica_async_engine
+from .instrumentation import capture_statements
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def _instrumented_engines():
+    engines = [engine, async_engine.sync_engine]
+    if replica_async_engine is not None:
+        engines.append(replica_async_engine.sync_engine)
+    return engines
+
+
+@contextmanager
+def assert_max_queries(budget: int, label: str = "block"):
+    """Fail if the block executes more than `budget` SQL statements"""
+    with capture_statements(*_instrumented_engines()) as log:
+        yield log
+    if log.count > budget:
+        statements = "\n".join(f"  {i + 1}. {statement}" for i, statement in enumerate(log.statements))
+        raise QueryBudgetExceeded(
+            f"{label} executed {log.count} SQL statements, budget is {budget}:\n{statements}"
+        )
+
+
+def max_queries(budget: int):
+    """Decorator form of assert_max_queries for a whole test function"""
+    def decorator(test_function):
+        label = test_function.__name__
+        if inspect.iscoroutinefunction(test_function):
+            @functools.wraps(test_function)
+            async def async_wrapper(*args, **kwargs):
+                with assert_max_queries(budget, label):
+                    return await test_function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(test_function)
+        def wrapper(*args, **kwargs):
+            with assert_max_queries(budget, label):
+                return test_function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@pytest.fixture
+def query_budget():
+    """Context manager factory: `with query_budget(n): ...` fails if more than n statements run"""
+    return assert_max_queries
@@ -0,0 +1,339 @@
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, FrozenSet, List, Optional
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import and_, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Bundle, aliased, joinedload, load_only
+
+from . import models, schemas
+from .pagination import apply_keyset, decode_cursor, set_next_cursor
+from .responses import sparse_video_model
+from .search import video_search_filter, video_tags_filter
+
+# Query and projection shared by the video list endpoints (/videos/, /videos/search/).
+# One statement returns each video with its category, creator and, when asked for,
+# the caller's progress; rows are mapped straight into VideoTutorialWithCategory.
+
+# Sorts the video lists can page through with a cursor; unknown values sort by id
+VIDEO_SORT_COLUMNS = {
+    "title": models.VideoTutorial.title,
+    "creator": models.VideoTutorial.creator,
+    "published_date": models.VideoTutorial.published_date,
+}
+
+# Names accepted by the fields= parameter, and the VideoTutorial columns among them
+VIDEO_LIST_FIELDS = tuple(schemas.VideoTutorialWithCategory.model_fields)
+VIDEO_COLUMN_FIELDS = frozenset(schemas.VideoTutorial.model_fields)
+
+# Rows fetched per round trip by the NDJSON export
+EXPORT_BATCH_SIZE = 500
+
+# progress_data for videos the user never opened (shared, never modified)
+EMPTY_PROGRESS_DATA = {
+    "last_watched": None,
+    "is_watched": False,
+    "watch_progress": 0,
+    "personal_notes": "",
+    "is_bookmarked": False,
+    # Frontend compatibility fields
+    "notes": "",
+    "position_seconds": 0,
+    "is_completed": False
+}
+
+# The caller's progress row, outer-joined by video_list_query. Built once: a fresh
+# alias per request costs more to construct and cache-key than the join itself
+progress_alias = aliased(models.VideoProgress, name="progress")
+# Only the columns progress_data needs, not a full VideoProgress object per row
+progress_columns = Bundle(
+    "progress",
+    progress_alias.id,
+    progress_alias.last_watched,
+    progress_alias.user_id,
+    progress_alias.video_id,
+    progress_alias.is_watched,
+    progress_alias.watch_progress,
+    progress_alias.personal_notes,
+    progress_alias.is_bookmarked,
+)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[FrozenSet[str]]:
+    """
+    Field names from a comma-separated `fields` parameter, always including id, or None
+    when every field is wanted. Unknown names are a 400.
+    """
+    if not fields:
+        return None
+    wanted = {name.strip() for name in fields.split(',') if name.strip()}
+    unknown = sorted(wanted.difference(VIDEO_LIST_FIELDS))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    return frozenset(wanted | {"id"})
+
+
+def video_load_options(fields: Optional[FrozenSet[str]] = None) -> list:
+    """
+    Loader options for list videos: all columns plus category and creator, or with `fields`
+    only the columns and relationships asked for.
+    """
+    # Category and creator are part of every full response and can't be lazy-loaded
+    # in async code, so always join them
+    if fields is None:
+        return [joinedload(models.VideoTutorial.category), joinedload(models.VideoTutorial.creator_obj)]
+
+    # description and key_points hold whole post bodies for Kemono imports; leaving
+    # them out is most of the saving. raiseload catches anything reading them anyway
+    columns = [getattr(models.VideoTutorial, name) for name in sorted(fields & VIDEO_COLUMN_FIELDS)]
+    options = [load_only(*columns, raiseload=True)]
+    if "category" in fields:
+        options.append(joinedload(models.VideoTutorial.category))
+    if "creator_obj" in fields:
+        options.append(joinedload(models.VideoTutorial.creator_obj))
+    return options
+
+
+def video_list_query(user_id: int, with_progress: bool, fields: Optional[FrozenSet[str]] = None):
+    """
+    select() of videos with category and creator joined in and, if with_progress, the
+    user's progress outer-joined into the same statement. With `fields` (from parse_fields)
+    only those columns and relationships are loaded.
+
+    Returns (query, progress): progress is the joined VideoProgress alias, for filtering
+    or sorting on it, or None without progress.
+    """
+    query = select(models.VideoTutorial).options(*video_load_options(fields))
+    if not with_progress:
+        return query, None
+    return join_progress(query, user_id).add_columns(progress_columns), progress_alias
+
+
+def join_progress(query, user_id: int):
+    """Outer-join the user's progress (progress_alias) to a query over videos"""
+    # Outer join keeps videos the user never opened
+    return query.outerjoin(
+        progress_alias,
+        and_(progress_alias.video_id == models.VideoTutorial.id, progress_alias.user_id == user_id)
+    )
+
+
+def filter_video_search(
+    query,
+    progress,
+    ts_query=None,
+    creator_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    tags: Optional[List[str]] = None,
+    tag_match: str = "all",
+    min_published_date: Optional[datetime] = None,
+    max_published_date: Optional[datetime] = None,
+    watched: Optional[bool] = None,
+    bookmarked: Optional[bool] = None,
+):
+    """The filters of /videos/search/; watched and bookmarked need progress joined"""
+    if ts_query is not None:
+        query = query.where(video_search_filter(ts_query))
+    
+    if creator_id:
+        query = query.where(models.VideoTutorial.creator_relation_id == creator_id)
+    
+    if category_id:
+        query = query.where(models.VideoTutorial.category_id == category_id)
+    
+    if tags:
+        query = query.where(video_tags_filter(tags, tag_match))
+    
+    if min_published_date:
+        query = query.where(models.VideoTutorial.published_date >= min_published_date)
+    
+    if max_published_date:
+        query = query.where(models.VideoTutorial.published_date <= max_published_date)
+    
+    # Videos without a progress row never match the watched/bookmark filters
+    if watched is not None:
+        query = query.where(progress.is_watched == watched)
+    
+    if bookmarked is not None:
+        query = query.where(progress.is_bookmarked == bookmarked)
+    return query
+
+
+def progress_data(progress) -> dict:
+    """progress_data of a list item, with both backend and frontend field names"""
+    if progress is None or progress.id is None:
+        return EMPTY_PROGRESS_DATA
+    return {
+        "id": progress.id,
+        "last_watched": progress.last_watched,
+        "user_id": progress.user_id,
+        "video_id": progress.video_id,
+        "is_watched": progress.is_watched,
+        "watch_progress": progress.watch_progress,
+        "personal_notes": progress.personal_notes,
+        "is_bookmarked": progress.is_bookmarked,
+        # Frontend compatibility fields
+        "notes": progress.personal_notes,
+        "position_seconds": progress.watch_progress,
+        "is_completed": progress.is_watched
+    }
+
+
+async def fetch_video_page(
+    db: AsyncSession,
+    query,
+    progress,
+    response: Response,
+    sort_by: str,
+    sort_order: str,
+    skip: int,
+    limit: int,
+    cursor: Optional[str] = None,
+    relevance=None,
+    fields: Optional[FrozenSet[str]] = None,
+) -> List[schemas.VideoTutorialWithCategory]:
+    """
+    Sort and paginate a query from video_list_query, by keyset when a cursor is given and
+    by offset otherwise, and map the rows to list items (with progress_data if it was joined).
+
+    `relevance` is the rank expression used for sort_by=relevance. Sorting by last_watched
+    needs the progress join. With `fields` the items are trimmed to them.
+    """
+    sort_order = "asc" if sort_order.lower() == "asc" else "desc"
+
+    if sort_by == "last_watched" and progress is not None:
+        sort_field = progress.last_watched
+    elif sort_by == "relevance" and relevance is not None:
+        sort_field = relevance
+    else:
+        sort_field = VIDEO_SORT_COLUMNS.get(sort_by, models.VideoTutorial.id)
+
+    after = decode_cursor(cursor, sort_by, sort_order, sort_field) if cursor else None
+    query = apply_keyset(query, sort_field, models.VideoTutorial.id, sort_order == "desc", after)
+    if after is None:
+        query = query.offset(skip)
+
+    # The sort value is selected for the next cursor, plus one extra row to tell
+    # whether there is a next page
+    rows = (await db.execute(query.add_columns(sort_field).limit(limit + 1))).all()
+    rows = set_next_cursor(response, rows, limit, sort_by, sort_order)
+
+    return video_items(rows, progress, fields)
+
+
+def video_items(rows, progress, fields: Optional[FrozenSet[str]] = None) -> list:
+    """List items for rows of a video_list_query (with progress_data if it was joined)"""
+    item_model = sparse_video_model(fields) if fields else schemas.VideoTutorialWithCategory
+    with_progress_data = progress is not None and "progress_data" in item_model.model_fields
+    items = []
+    for row in rows:
+        item = item_model.model_validate(row[0])
+        if with_progress_data:
+            item.progress_data = progress_data(row[1])
+        items.append(item)
+    return items
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows gzip (explicitly or through *, with q > 0)"""
+    for coding in accept_encoding.split(','):
+        name, _, params = coding.partition(';')
+        if name.strip().lower() not in ("gzip", "*"):
+            continue
+        quality = params.strip().lower().replace(' ', '')
+        if not quality.startswith("q="):
+            return True
+        try:
+            return float(quality[2:]) > 0
+        except ValueError:
+            return False
+    return False
+
+
+async def stream_video_export(
+    session_factory,
+    query,
+    progress,
+    fields: Optional[FrozenSet[str]] = None,
+    compress: bool = False,
+) -> AsyncIterator[bytes]:
+    """
+    NDJSON for a query from video_list_query: one list item per line, in id order, read
+    through a server-side cursor EXPORT_BATCH_SIZE rows at a time so memory stays flat
+    however large the catalog is. gzip-compressed if `compress`.
+
+    Opens its own session from session_factory, because the response is still streaming
+    after the endpoint (and its dependencies) have returned.
+    """
+    encoder = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    query = query.order_by(models.VideoTutorial.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    async with session_factory() as db:
+        result = await db.stream(query)
+        async for rows in result.partitions():
+            chunk = b"".join(
+                item.model_dump_json().encode() + b"\n" for item in video_items(rows, progress, fields)
+            )
+            if encoder is not None:
+                chunk = encoder.compress(chunk)
+            if chunk:
+                yield chunk
+    if encoder is not None:
+        yield encoder.flush()
+
+
+def _episode_query(video: models.VideoTutorial, later: bool):
+    """The episode right after (or before) a video in its category"""
+    published, video_id = models.VideoTutorial.published_date, models.VideoTutorial.id
+    query = select(
+        video_id, models.VideoTutorial.title, published,
+        literal("next" if later else "previous").label("direction")
+    ).where(models.VideoTutorial.category_id == video.category_id)
+
+    # Episodes run in (published_date, id) order with undated videos last, as in the lists
+    if video.published_date is None:
+        after = and_(published.is_(None), video_id > video.id)
+        before = or_(published.is_not(None), video_id < video.id)
+    else:
+        after = or_(
+            published.is_(None),
+            published > video.published_date,
+            and_(published == video.published_date, video_id > video.id),
+        )
+        before = or_(
+            published < video.published_date,
+            and_(published == video.published_date, video_id < video.id),
+        )
+    if later:
+        return query.where(after).order_by(published.asc().nulls_last(), video_id.asc()).limit(1)
+    return query.where(before).order_by(published.desc().nulls_first(), video_id.desc()).limit(1)
+
+
+async def load_video_bundle(db: AsyncSession, video_id: int, user_id: int) -> Optional[schemas.VideoDetailBundle]:
+    """
+    The video player page's data, or None if the video doesn't exist: the video with its
+    category and creator, the user's progress and the previous and next episodes.
+    Two statements whatever the catalog size.
+    """
+    query, _ = video_list_query(user_id, True)
+    row = (await db.execute(query.where(models.VideoTutorial.id == video_id))).first()
+    if row is None:
+        return None
+    video, progress = row
+
+    episodes = {}
+    if video.category_id is not None:
+        previous_query = _episode_query(video, later=False).subquery()
+        next_query = _episode_query(video, later=True).subquery()
+        neighbours = select(previous_query).union_all(select(next_query))
+        episodes = {episode.direction: episode for episode in await db.execute(neighbours)}
+
+    return schemas.VideoDetailBundle(
+        video=schemas.VideoTutorialWithCategory.model_validate(video),
+        progress=schemas.VideoProgress(**progress_data(progress)) if progress.id is not None else None,
+        previous_episode=schemas.VideoEpisode.model_validate(episodes["previous"]) if "previous" in episodes else None,
+        next_episode=schemas.VideoEpisode.model_validate(episodes["next"]) if "next" in episodes else None,
+    )
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Load benchmark for the LoL Improve API.
+
+Fires authenticated GET requests at one or more running API servers with a
+fixed number of concurrent clients and reports requests per second and latency
+percentiles for each. To compare before/after a change, start the old build
+and the new build on different ports and pass both as targets:
+
+    python benchmarks/load_benchmark.py \
+        --target before=http://localhost:8001 \
+        --target after=http://localhost:8000 \
+        --username admin --password secret
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+DEFAULT_PATHS = [
+    "/users/me",
+    "/videos/?limit=100",
+    "/videos/search/?limit=50",
+    "/game-sessions/",
+    "/goals/",
+    "/champion-pools/",
+]
+
+
+async def get_token(client: httpx.AsyncClient, username: str, password: str) -> str:
+    """Log in once and return a bearer token"""
+    response = await client.post("/token", data={"username": username, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def worker(client: httpx.AsyncClient, paths: List[str], deadline: float,
+                 latencies: List[float], errors: Dict[str, int]):
+    """Request the paths round-robin until the deadline passes"""
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+                continue
+        except httpx.HTTPError as e:
+            errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def run_target(base_url: str, args) -> Dict[str, float]:
+    """Run the load against a single server and summarise the results"""
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        token = await get_token(client, args.username, args.password)
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        # Warm up connections and server-side caches before measuring
+        await asyncio.gather(*(client.get(path) for path in args.paths))
+
+        latencies: List[float] = []
+        errors: Dict[str, int] = {}
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            worker(client, args.paths, deadline, latencies, errors)
+            for _ in range(args.concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors.values()),
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare API throughput between servers")
+    parser.add_argument("--target", action="append", default=[],
+                        help="label=base_url, may be repeated (default: current=http://localhost:8000)")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--concurrency", type=int, default=200, help="Number of concurrent clients")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds to run per target")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--path", dest="paths", action="append", help="Path to request, may be repeated")
+    args = parser.parse_args()
+    args.paths = args.paths or DEFAULT_PATHS
+
+    targets = [t.split("=", 1) for t in args.target] or [["current", "http://localhost:8000"]]
+
+    results = {}
+    for label, base_url in targets:
+        print(f"Running {args.duration:.0f}s at concurrency {args.concurrency} against {label} ({base_url})...")
+        results[label] = asyncio.run(run_target(base_url, args))
+
+    print()
+    print(f"{'target':<12}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for label, r in results.items():
+        print(f"{label:<12}{r['requests']:>10}{r['errors']:>8}{r['rps']:>10.1f}"
+              f"{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}")
+
+    if len(results) > 1:
+        baseline_label = targets[0][0]
+        baseline = results[baseline_label]["rps"]
+        for label, r in list(results.items())[1:]:
+            if baseline:
+                print(f"{label} vs {baseline_label}: {r['rps'] / baseline:.2f}x requests per second")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+"""
+Route resolution benchmark for the LoL Improve API.
+
+Compares the old layout, where every router was registered twice (bare and with
+the /api prefix), with the current single route table behind ApiPrefixMiddleware.
+For each path it measures the time to find the matching route the way Starlette's
+router does (a linear scan, plus a second scan for the trailing-slash redirect
+when nothing matches), and it also reports route counts and OpenAPI build time.
+
+No database is needed. Usage (from the backend directory):
+
+    python benchmarks/route_benchmark.py
+    python benchmarks/route_benchmark.py --path /api/videos/search/ --iterations 50000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI  # noqa: E402
+from starlette.routing import Match  # noqa: E402
+
+from app.api_prefix import strip_api_prefix  # noqa: E402
+from app.main import app  # noqa: E402
+from app.routers import users, game_sessions, videos, goals, champion_pools  # noqa: E402
+
+DEFAULT_PATHS = [
+    ("GET", "/api/videos/search/"),
+    ("GET", "/api/videos/search"),
+    ("GET", "/api/videos/bookmarked/"),
+    ("GET", "/api/videos/creators/1/videos"),
+    ("POST", "/api/videos/update-categories"),
+    ("GET", "/api/users/me"),
+    ("GET", "/videos/search/"),
+]
+
+
+def build_legacy_app() -> FastAPI:
+    """The app as it was routed before: every router included bare and under /api"""
+    legacy = FastAPI()
+    for router in (users.router, game_sessions.router, videos.router, goals.router, champion_pools.router):
+        legacy.include_router(router)
+    for router in (users.router, game_sessions.router, videos.router, goals.router, champion_pools.router):
+        legacy.include_router(router, prefix="/api")
+    return legacy
+
+
+def make_scope(method: str, path: str) -> dict:
+    return {"type": "http", "method": method, "path": path, "root_path": "", "headers": [], "query_string": b""}
+
+
+def resolve(routes, scope) -> str:
+    """Mirror of starlette.routing.Router.app's matching, without calling the endpoint"""
+    partial = None
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route
+    if partial is not None:
+        return partial.path
+    if scope["path"] != "/":
+        redirect_scope = dict(scope)
+        if scope["path"].endswith("/"):
+            redirect_scope["path"] = scope["path"].rstrip("/")
+        else:
+            redirect_scope["path"] = scope["path"] + "/"
+        for route in routes:
+            match, _ = route.matches(redirect_scope)
+            if match != Match.NONE:
+                return f"redirect -> {route.path}"
+    return "404"
+
+
+def time_resolution(routes, method: str, path: str, iterations: int, normalize: bool):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        scope = make_scope(method, path)
+        if normalize:
+            strip_api_prefix(scope)
+        resolve(routes, scope)
+    elapsed = time.perf_counter() - started
+
+    scope = make_scope(method, path)
+    if normalize:
+        strip_api_prefix(scope)
+    return elapsed / iterations * 1_000_000, resolve(routes, scope)
+
+
+def time_openapi(target: FastAPI, repeat: int):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        target.openapi_schema = None
+        schema = target.openapi()
+    return (time.perf_counter() - started) / repeat * 1000, len(schema["paths"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark route resolution with and without the duplicate /api routes")
+    parser.add_argument("--path", action="append", help="METHOD:PATH or PATH to resolve (repeatable, default: a set of slow paths)")
+    parser.add_argument("--iterations", type=int, default=20000, help="Resolutions per path")
+    parser.add_argument("--openapi-repeat", type=int, default=5, help="OpenAPI schema builds to average")
+    args = parser.parse_args()
+
+    paths = DEFAULT_PATHS
+    if args.path:
+        paths = []
+        for value in args.path:
+            method, _, path = value.rpartition(":")
+            paths.append((method.upper() or "GET", path))
+
+    legacy = build_legacy_app()
+    print(f"routes: legacy={len(legacy.routes)} current={len(app.routes)}")
+
+    legacy_ms, legacy_paths = time_openapi(legacy, args.openapi_repeat)
+    current_ms, current_paths = time_openapi(app, args.openapi_repeat)
+    print(f"openapi: legacy={legacy_ms:.1f}ms ({legacy_paths} paths) current={current_ms:.1f}ms ({current_paths} paths)")
+    print()
+
+    print(f"{'method':<7}{'path':<36}{'legacy us':>11}{'current us':>12}{'speedup':>9}  resolved")
+    for method, path in paths:
+        legacy_us, legacy_match = time_resolution(legacy.routes, method, path, args.iterations, normalize=False)
+        current_us, current_match = time_resolution(app.routes, method, path, args.iterations, normalize=True)
+        print(
+            f"{method:<7}{path:<36}{legacy_us:>11.2f}{current_us:>12.2f}{legacy_us / current_us:>8.2f}x"
+            f"  {current_match}"
+        )
+        if legacy_match.replace("/api", "", 1) != current_match:
+            print(f"       note: legacy resolved to {legacy_match}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+"""
+Search benchmark for /videos/search.
+
+Builds a synthetic catalog (100k videos by default) in a scratch schema of the
+database in DATABASE_URL, then compares the old `title/description ILIKE '%q%'`
+filter with the full-text search used by the API (generated tsvector + GIN index,
+ranked by relevance). Reports the median latency of each query and the plan node
+Postgres picked. The scratch schema is dropped at the end unless --keep is given.
+
+Usage (from the backend directory, against a Postgres database):
+
+    python benchmarks/search_benchmark.py
+    python benchmarks/search_benchmark.py --rows 100000 --query "wave manage" --query "jungle path"
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import Column, Computed, Integer, MetaData, Table, Text, create_engine, func, or_, select, text  # noqa: E402
+from sqlalchemy.dialects.postgresql import TSVECTOR  # noqa: E402
+
+from app.models import VIDEO_SEARCH_VECTOR  # noqa: E402
+from app.search import video_search_query  # noqa: E402
+from app.settings import settings  # noqa: E402
+
+SCHEMA = "search_benchmark"
+
+VOCABULARY = [
+    "jungle", "pathing", "gank", "clear", "objective", "dragon", "baron", "herald", "vision", "ward",
+    "wave", "management", "freeze", "slow", "push", "recall", "timing", "trading", "lane", "matchup",
+    "rotation", "macro", "teamfight", "engage", "peel", "split", "pushing", "roam", "tempo", "priority",
+    "mid", "top", "bot", "support", "adc", "carry", "scaling", "early", "game", "late",
+    "counter", "pick", "draft", "champion", "pool", "mechanics", "combo", "animation", "cancel", "kiting",
+    "positioning", "cooldown", "tracking", "summoner", "flash", "ignite", "smite", "build", "items", "runes",
+]
+
+DEFAULT_QUERIES = ["jungle pathing", "wave management", "teamfight positioning", "drag", "baron timing cooldown"]
+
+metadata = MetaData(schema=SCHEMA)
+videos = Table(
+    "video_tutorials",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("title", Text),
+    Column("description", Text),
+    Column("key_points", Text),
+    Column("search_vector", TSVECTOR, Computed(VIDEO_SEARCH_VECTOR, persisted=True)),
+)
+
+
+def random_text(words: int) -> str:
+    """SQL for `words` random vocabulary words; `i` keeps it from being evaluated only once"""
+    return (
+        f"(SELECT string_agg(v.w[1 + floor(random() * array_length(v.w, 1))::int], ' ') "
+        f"FROM generate_series(1, {words}) WHERE i > 0)"
+    )
+
+
+def build_catalog(engine, rows: int):
+    vocabulary = "ARRAY[" + ", ".join(f"'{word}'" for word in VOCABULARY) + "]"
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        metadata.create_all(conn)
+        conn.execute(text(
+            f"INSERT INTO {SCHEMA}.video_tutorials (title, description, key_points) "
+            f"SELECT {random_text(6)}, {random_text(60)}, {random_text(20)} "
+            f"FROM generate_series(1, :rows) AS i, (SELECT {vocabulary} AS w) AS v"
+        ), {"rows": rows})
+        conn.execute(text(
+            f"CREATE INDEX ix_search_benchmark_search_vector ON {SCHEMA}.video_tutorials USING gin (search_vector)"
+        ))
+        conn.execute(text(f"ANALYZE {SCHEMA}.video_tutorials"))
+
+
+def ilike_query(q: str, limit: int):
+    pattern = f"%{q}%"
+    return (
+        select(videos.c.id)
+        .where(or_(videos.c.title.ilike(pattern), videos.c.description.ilike(pattern)))
+        .order_by(videos.c.id.desc())
+        .limit(limit)
+    )
+
+
+def fulltext_query(q: str, limit: int):
+    ts_query = video_search_query(q)
+    rank = func.ts_rank_cd(videos.c.search_vector, ts_query)
+    return (
+        select(videos.c.id, rank)
+        .where(videos.c.search_vector.op("@@")(ts_query))
+        .order_by(rank.desc(), videos.c.id.desc())
+        .limit(limit)
+    )
+
+
+def measure(conn, statement, repeat: int):
+    timings = []
+    rows = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = len(conn.execute(statement).all())
+        timings.append((time.perf_counter() - started) * 1000)
+    compiled = statement.compile(conn)
+    plan = conn.exec_driver_sql("EXPLAIN " + str(compiled), compiled.params).scalars().all()
+    scan = next((line.strip().lstrip("-> ").split("  ")[0] for line in plan if "Scan" in line), plan[0])
+    return statistics.median(timings), rows, scan
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ILIKE and full-text video search on a synthetic catalog")
+    parser.add_argument("--rows", type=int, default=100_000, help="Videos in the synthetic catalog")
+    parser.add_argument("--query", action="append", help="Search text (repeatable)")
+    parser.add_argument("--limit", type=int, default=50, help="Page size, as in /videos/search/")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per query (median is reported)")
+    parser.add_argument("--keep", action="store_true", help=f"Keep the {SCHEMA} schema afterwards")
+    args = parser.parse_args()
+
+    engine = create_engine(settings.database_url)
+    started = time.perf_counter()
+    build_catalog(engine, args.rows)
+    print(f"built {args.rows} videos in {time.perf_counter() - started:.1f}s")
+    print()
+
+    print(f"{'query':<26}{'ilike ms':>10}{'rows':>6}  {'plan':<28}{'fts ms':>9}{'rows':>6}  plan")
+    try:
+        with engine.connect() as conn:
+            for q in args.query or DEFAULT_QUERIES:
+                ilike_ms, ilike_rows, ilike_scan = measure(conn, ilike_query(q, args.limit), args.repeat)
+                fts_ms, fts_rows, fts_scan = measure(conn, fulltext_query(q, args.limit), args.repeat)
+                print(
+                    f"{q:<26}{ilike_ms:>10.2f}{ilike_rows:>6}  {ilike_scan[:26]:<28}"
+                    f"{fts_ms:>9.2f}{fts_rows:>6}  {fts_scan}"
+                )
+    finally:
+        if not args.keep:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
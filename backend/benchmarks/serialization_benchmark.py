@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+"""
+Serialization benchmark for the large list responses.
+
+Builds synthetic pages of VideoTutorialWithCategory items (as the video list
+endpoints produce them) and of GameSession rows (ORM objects, as /game-sessions/
+returns them) and times turning each page into response bytes:
+
+  fastapi   FastAPI's default: validate against response_model, dump to Python
+            objects, encode with the stdlib json module (JSONResponse)
+  orjson    the same validation and dump, encoded with orjson (only if installed)
+  adapter   TypeAdapterJSONResponse, used with FAST_JSON_RESPONSES=true: validation
+            and JSON encoding in one pass with a precompiled TypeAdapter
+
+No database is needed. Usage (from the backend directory):
+
+    python benchmarks/serialization_benchmark.py
+    python benchmarks/serialization_benchmark.py --rows 100 --rows 1000 --rows 5000 --repeat 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from app import models, schemas  # noqa: E402
+from app.responses import GAME_SESSION_LIST, VIDEO_LIST, TypeAdapterJSONResponse  # noqa: E402
+from app.video_lists import progress_data  # noqa: E402
+
+try:
+    from fastapi.responses import ORJSONResponse
+    import orjson  # noqa: F401
+except ImportError:
+    ORJSONResponse = None
+
+
+def video_page(rows: int) -> List[schemas.VideoTutorialWithCategory]:
+    category = schemas.VideoCategory(id=1, name="Fundamentals", description="Core concepts")
+    creator = schemas.Creator(id=1, name="Coach", description=None, website="https://example.com")
+    published = datetime(2024, 1, 1)
+    return [
+        schemas.VideoTutorialWithCategory(
+            id=i,
+            title=f"Wave management part {i}",
+            creator="Coach",
+            url=f"https://example.com/videos/{i}",
+            description="How to freeze, slow push and crash waves. " * 5,
+            video_type="youtube",
+            key_points="Freeze near tower; crash before recall; track the jungler",
+            category_id=1,
+            creator_relation_id=1,
+            published_date=published + timedelta(hours=i),
+            tags=["laning", "waves", "macro"],
+            category=category,
+            creator_obj=creator,
+            progress_data=progress_data(None),
+        )
+        for i in range(rows)
+    ]
+
+
+def game_session_page(rows: int) -> List[models.GameSession]:
+    return [
+        models.GameSession(
+            id=i,
+            date=datetime(2024, 1, 1) + timedelta(hours=i),
+            player_character="Ahri",
+            enemy_character="Zed",
+            result="Win" if i % 2 else "Lose",
+            mood_rating=4,
+            goal_progress=[{"goal_id": 1, "title": "CS 8/min", "notes": "ok", "progress_rating": 3}],
+            notes="Roamed bot after 6",
+            user_id=1,
+        )
+        for i in range(rows)
+    ]
+
+
+def make_encoders(response_type, adapter):
+    field = create_response_field(name="response", type_=response_type)
+
+    def fastapi_default(page):
+        content = asyncio.run(serialize_response(field=field, response_content=page))
+        return JSONResponse(content).body
+
+    def fastapi_orjson(page):
+        content = asyncio.run(serialize_response(field=field, response_content=page))
+        return ORJSONResponse(content).body
+
+    def type_adapter(page):
+        return TypeAdapterJSONResponse(page, adapter).body
+
+    encoders = {"fastapi": fastapi_default}
+    if ORJSONResponse is not None:
+        encoders["orjson"] = fastapi_orjson
+    encoders["adapter"] = type_adapter
+    return encoders
+
+
+def measure(encode, page, repeat: int):
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(encode(page))
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare response serialization paths for large list pages")
+    parser.add_argument("--rows", type=int, action="append", help="Page size (repeatable, default 100/1000/5000)")
+    parser.add_argument("--repeat", type=int, default=10, help="Encodings per measurement (median is reported)")
+    args = parser.parse_args()
+
+    schemas_under_test = (
+        ("videos", List[schemas.VideoTutorialWithCategory], VIDEO_LIST, video_page),
+        ("game sessions", List[schemas.GameSession], GAME_SESSION_LIST, game_session_page),
+    )
+    print(f"{'schema':<15}{'rows':>6}  {'path':<9}{'ms':>10}{'rows/s':>12}{'speedup':>9}{'bytes':>10}")
+    for name, response_type, adapter, build_page in schemas_under_test:
+        encoders = make_encoders(response_type, adapter)
+        for rows in args.rows or [100, 1000, 5000]:
+            page = build_page(rows)
+            baseline = None
+            for path, encode in encoders.items():
+                seconds, size = measure(encode, page, args.repeat)
+                baseline = baseline or seconds
+                print(
+                    f"{name:<15}{rows:>6}  {path:<9}{seconds * 1000:>10.2f}{rows / seconds:>12.0f}"
+                    f"{baseline / seconds:>8.2f}x{size:>10}"
+                )
+
+
+if __name__ == "__main__":
+    main()
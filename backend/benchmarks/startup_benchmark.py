@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+Startup benchmark for the LoL Improve API.
+
+Each run starts a fresh Python process, the same way a new worker boots, and
+measures:
+
+- import: time to import app.main
+- startup: time for the lifespan hook (pool and cache warm-up)
+- first_request: latency of the first request to --path
+- second_request: latency of a repeat request, as a warm reference
+
+Usage (from the backend directory, with DATABASE_URL pointing at a migrated database):
+
+    python benchmarks/startup_benchmark.py --runs 10
+    python benchmarks/startup_benchmark.py --path /videos/ --username admin --password secret
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER_SNIPPET = r"""
+import json, sys, time
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+path, username, password = sys.argv[1], sys.argv[2], sys.argv[3]
+with TestClient(app) as client:
+    ready = time.perf_counter()
+    if username:
+        token = client.post("/token", data={"username": username, "password": password}).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+    first_started = time.perf_counter()
+    response = client.get(path)
+    first_done = time.perf_counter()
+    client.get(path)
+    second_done = time.perf_counter()
+print(json.dumps({
+    "import": imported - started,
+    "startup": ready - imported,
+    "first_request": first_done - first_started,
+    "second_request": second_done - first_done,
+    "status": response.status_code,
+}))
+"""
+
+
+def run_worker(args) -> dict:
+    """Boot one fresh worker process and return its timings"""
+    result = subprocess.run(
+        [sys.executable, "-c", WORKER_SNIPPET, args.path, args.username or "", args.password or ""],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Worker failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-worker import, startup and first-request latency")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh worker processes to boot")
+    parser.add_argument("--path", default="/", help="Path requested after startup")
+    parser.add_argument("--username", help="Log in first so --path can be an authenticated endpoint")
+    parser.add_argument("--password")
+    args = parser.parse_args()
+
+    samples = []
+    for i in range(args.runs):
+        sample = run_worker(args)
+        samples.append(sample)
+        print(f"run {i + 1}: import {sample['import'] * 1000:.0f} ms, startup {sample['startup'] * 1000:.0f} ms, "
+              f"first request {sample['first_request'] * 1000:.1f} ms (HTTP {sample['status']})")
+
+    print()
+    print(f"{'phase':<16}{'median ms':>12}{'min ms':>10}{'max ms':>10}")
+    for phase in ("import", "startup", "first_request", "second_request"):
+        values = [s[phase] * 1000 for s in samples]
+        print(f"{phase:<16}{statistics.median(values):>12.1f}{min(values):>10.1f}{max(values):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+"""
+Video list benchmark for /videos/ and /videos/search/ with expand=progress.
+
+Compares the old way of building a page (video query, then a second
+VideoProgress IN-query, then two dicts per video setattr'd onto the ORM objects)
+with the shared video_lists query, which returns videos, category, creator and
+the caller's progress in one outer-joined statement mapped straight into
+VideoTutorialWithCategory. Both pages are serialized to JSON the way FastAPI
+does it. Reports the median latency and the tracemalloc peak per page.
+
+Runs against the database in DATABASE_URL. With --seed, a user, categories,
+creators, videos and progress rows are inserted first inside a transaction that
+is rolled back at the end, so nothing is left behind. Usage (from the backend
+directory):
+
+    python benchmarks/video_list_benchmark.py --seed 5000
+    python benchmarks/video_list_benchmark.py --username admin --limit 500 --repeat 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import Response  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import select, text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+from sqlalchemy.orm import joinedload  # noqa: E402
+
+from app import models, schemas  # noqa: E402
+from app.database import async_engine  # noqa: E402
+from app.video_lists import fetch_video_page, video_list_query  # noqa: E402
+
+page_adapter = TypeAdapter(List[schemas.VideoTutorialWithCategory])
+
+SEED_STATEMENTS = [
+    "INSERT INTO users (email, username, hashed_password, is_active, is_admin) "
+    "VALUES ('video-list-benchmark@example.com', :username, '', true, false)",
+    "INSERT INTO video_categories (name) "
+    "SELECT 'video-list-benchmark ' || i FROM generate_series(1, 10) AS i",
+    "INSERT INTO creators (name) "
+    "SELECT 'video-list-benchmark ' || i FROM generate_series(1, 50) AS i",
+    "INSERT INTO video_tutorials (title, creator, creator_relation_id, url, description, video_type, "
+    "key_points, published_date, tags, category_id) "
+    "SELECT 'Benchmark video ' || i, c.name, c.id, 'https://example.com/' || i, repeat('description ', 20), "
+    "'youtube', repeat('key point ', 10), now() - i * interval '1 hour', '[\"laning\", \"macro\"]'::jsonb, "
+    "(SELECT id FROM video_categories WHERE name = 'video-list-benchmark ' || (1 + i % 10)) "
+    "FROM generate_series(1, :rows) AS i "
+    "JOIN creators AS c ON c.name = 'video-list-benchmark ' || (1 + i % 50)",
+    # Progress on every other video, so the page mixes both progress_data shapes
+    "INSERT INTO video_progress (user_id, video_id, is_watched, watch_progress, personal_notes, "
+    "last_watched, is_bookmarked) "
+    "SELECT u.id, v.id, v.id % 4 = 0, 120, 'notes', now(), v.id % 3 = 0 "
+    "FROM video_tutorials AS v, users AS u "
+    "WHERE u.username = :username AND v.title LIKE 'Benchmark video %' AND v.id % 2 = 0",
+]
+
+
+async def legacy_page(db: AsyncSession, user_id: int, limit: int) -> bytes:
+    """The page as it was built before: two queries and setattr on the ORM objects"""
+    videos = (await db.scalars(
+        select(models.VideoTutorial)
+        .options(joinedload(models.VideoTutorial.category), joinedload(models.VideoTutorial.creator_obj))
+        .order_by(models.VideoTutorial.published_date.desc().nulls_last(), models.VideoTutorial.id.desc())
+        .limit(limit)
+    )).unique().all()
+    progress_records = (await db.scalars(select(models.VideoProgress).where(
+        models.VideoProgress.video_id.in_([video.id for video in videos]),
+        models.VideoProgress.user_id == user_id
+    ))).all()
+    progress_map = {p.video_id: p for p in progress_records}
+    for video in videos:
+        progress = progress_map.get(video.id)
+        if progress:
+            setattr(video, "progress_data", {
+                "id": progress.id,
+                "last_watched": progress.last_watched,
+                "user_id": progress.user_id,
+                "video_id": progress.video_id,
+                "is_watched": progress.is_watched,
+                "watch_progress": progress.watch_progress,
+                "personal_notes": progress.personal_notes,
+                "is_bookmarked": progress.is_bookmarked,
+                "notes": progress.personal_notes,
+                "position_seconds": progress.watch_progress,
+                "is_completed": progress.is_watched
+            })
+        else:
+            setattr(video, "progress_data", {
+                "last_watched": None,
+                "is_watched": False,
+                "watch_progress": 0,
+                "personal_notes": "",
+                "is_bookmarked": False,
+                "notes": "",
+                "position_seconds": 0,
+                "is_completed": False
+            })
+    return page_adapter.dump_json(page_adapter.validate_python(videos, from_attributes=True))
+
+
+async def shared_page(db: AsyncSession, user_id: int, limit: int) -> bytes:
+    """The page as /videos/?expand=progress builds it now"""
+    query, progress = video_list_query(user_id, True)
+    items = await fetch_video_page(db, query, progress, Response(), "published_date", "desc", 0, limit)
+    return page_adapter.dump_json(page_adapter.validate_python(items))
+
+
+async def measure(db: AsyncSession, build, user_id: int, limit: int, repeat: int):
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        # Start from an empty identity map each time, like a new request's session
+        db.expunge_all()
+        started = time.perf_counter()
+        size = len(await build(db, user_id, limit))
+        timings.append((time.perf_counter() - started) * 1000)
+
+    db.expunge_all()
+    tracemalloc.start()
+    await build(db, user_id, limit)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak / 1024, size
+
+
+async def run(args):
+    async with async_engine.connect() as conn:
+        transaction = await conn.begin()
+        try:
+            if args.seed:
+                started = time.perf_counter()
+                for statement in SEED_STATEMENTS:
+                    await conn.execute(text(statement), {"username": args.username, "rows": args.seed})
+                print(f"seeded {args.seed} videos in {time.perf_counter() - started:.1f}s (rolled back at the end)")
+
+            user_id = (await conn.execute(
+                text("SELECT id FROM users WHERE username = :username"), {"username": args.username}
+            )).scalar()
+            if user_id is None:
+                sys.exit(f"no user named {args.username!r}; pass --username or --seed")
+
+            db = AsyncSession(bind=conn, expire_on_commit=False)
+            print(f"{'path':<10}{'median ms':>11}{'peak KiB':>11}{'bytes':>10}")
+            for name, build in (("legacy", legacy_page), ("shared", shared_page)):
+                ms, peak_kib, size = await measure(db, build, user_id, args.limit, args.repeat)
+                print(f"{name:<10}{ms:>11.2f}{peak_kib:>11.0f}{size:>10}")
+            await db.close()
+        finally:
+            await transaction.rollback()
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the old and the shared video list query for large pages")
+    parser.add_argument("--seed", type=int, default=0, help="Insert this many synthetic videos first (rolled back)")
+    parser.add_argument("--username", default="video-list-benchmark", help="User whose progress is joined")
+    parser.add_argument("--limit", type=int, default=500, help="Page size")
+    parser.add_argument("--repeat", type=int, default=20, help="Pages built per path (median is reported)")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+from app import models
+
+
+def video_payload(title):
+    return {
+        "title": title,
+        "creator": "Coach",
+        "url": "https://example.com/new.mp4",
+        "video_type": "direct",
+    }
+
+
+def test_matching_etag_gets_304(client, auth_headers, add_videos, query_budget):
+    add_videos(5)
+    response = client.get("/videos/", headers=auth_headers)
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    # Answered after reading the catalog version alone
+    with query_budget(1, "conditional GET /videos/"):
+        response = client.get("/videos/", headers={**auth_headers, "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+
+def test_write_changes_the_etag(client, auth_headers, add_videos):
+    add_videos(2)
+    etag = client.get("/videos/", headers=auth_headers).headers["ETag"]
+    categories_etag = client.get("/videos/categories/", headers=auth_headers).headers["ETag"]
+
+    response = client.post("/videos/", json=video_payload("New lesson"), headers=auth_headers)
+    assert response.status_code == 201
+
+    response = client.get("/videos/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert "New lesson" in [video["title"] for video in response.json()]
+    # One version for the whole catalog
+    response = client.get("/videos/categories/", headers={**auth_headers, "If-None-Match": categories_etag})
+    assert response.status_code == 200
+
+
+def test_lists_with_progress_are_not_tagged(client, auth_headers, add_videos):
+    add_videos(2)
+
+    for url in ("/videos/?expand=progress", "/videos/?sort_by=last_watched", "/videos/search/?watched=true"):
+        response = client.get(url, headers={**auth_headers, "If-None-Match": "*"})
+        assert response.status_code == 200, url
+        assert "ETag" not in response.headers, url
+
+
+def test_import_is_all_or_nothing(client, db, auth_headers, add_videos):
+    add_videos(1)
+    etag = client.get("/videos/", headers=auth_headers).headers["ETag"]
+    items = [video_payload("First"), {"creator": "Coach", "url": "https://example.com/2.mp4"}]
+
+    response = client.post("/videos/import", json=items, headers=auth_headers)
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", 1, "title"]
+    assert db.query(models.VideoTutorial).count() == 1
+    response = client.get("/videos/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+    response = client.post("/videos/import", json=items[:1], headers=auth_headers)
+
+    assert response.status_code == 201
+    response = client.get("/videos/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 2
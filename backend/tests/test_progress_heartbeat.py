@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app import models
+from app.progress_buffer import flush_progress
+
+
+@pytest.fixture
+def video(add_videos):
+    return add_videos(1)[0]
+
+
+def saved_progress(db, user, video):
+    db.expire_all()
+    return db.scalar(select(models.VideoProgress).where(
+        models.VideoProgress.user_id == user.id,
+        models.VideoProgress.video_id == video.id,
+    ))
+
+
+def heartbeat(client, headers, video_id, position, event="playing"):
+    response = client.post(
+        f"/videos/{video_id}/progress/heartbeat",
+        json={"position_seconds": position, "event": event},
+        headers=headers,
+    )
+    assert response.status_code == 204
+
+
+def test_playing_heartbeats_are_buffered(client, db, user, auth_headers, video, query_budget):
+    with query_budget(0, "buffered heartbeats"):
+        for position in (5, 10, 15):
+            heartbeat(client, auth_headers, video.id, position)
+    assert saved_progress(db, user, video) is None
+
+    # The flush runs on the app's event loop, like the periodic one
+    client.portal.call(flush_progress)
+
+    progress = saved_progress(db, user, video)
+    assert progress.watch_progress == 15
+    assert not progress.is_watched
+
+
+def test_pause_and_complete_are_written_at_once(client, db, user, auth_headers, video, add_videos):
+    other_video = add_videos(1)[0]
+    heartbeat(client, auth_headers, other_video.id, 30)
+
+    heartbeat(client, auth_headers, video.id, 42, event="pause")
+    assert saved_progress(db, user, video).watch_progress == 42
+    # Only the paused video is written
+    assert saved_progress(db, user, other_video) is None
+
+    heartbeat(client, auth_headers, video.id, 600, event="complete")
+    progress = saved_progress(db, user, video)
+    assert progress.watch_progress == 600
+    assert progress.is_watched
+
+
+def test_full_write_takes_the_buffered_heartbeat(client, db, user, auth_headers, video):
+    heartbeat(client, auth_headers, video.id, 20)
+
+    response = client.post(
+        f"/videos/{video.id}/progress", json={"position_seconds": 90, "notes": "Good wave tips"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    client.portal.call(flush_progress)
+
+    progress = saved_progress(db, user, video)
+    assert progress.watch_progress == 90
+    assert progress.personal_notes == "Good wave tips"
+
+
+def test_stale_heartbeat_does_not_overwrite_a_newer_write(client, db, user, auth_headers, video):
+    heartbeat(client, auth_headers, video.id, 20)
+    # Meanwhile another worker saves progress, so the buffered heartbeat isn't taken back
+    db.add(models.VideoProgress(
+        user_id=user.id, video_id=video.id, watch_progress=300, is_watched=True,
+        last_watched=datetime.utcnow() + timedelta(seconds=1),
+    ))
+    db.commit()
+
+    client.portal.call(flush_progress)
+
+    progress = saved_progress(db, user, video)
+    assert progress.watch_progress == 300
+    assert progress.is_watched
+
+
+def test_heartbeat_for_unknown_video_is_dropped(client, db, auth_headers, video):
+    heartbeat(client, auth_headers, video.id + 100, 10)
+
+    client.portal.call(flush_progress)
+
+    assert db.scalar(select(models.VideoProgress)) is None
@@ -0,0 +1,89 @@
+"""
+Statement budgets of the hot endpoints. The data is large enough that a query per row
+(lazy loads, a lookup per video or champion) would blow the budget.
+"""
+from unittest.mock import patch
+
+import pytest
+
+from app import models
+from app.services.kemono_service import KemonoService
+
+
+@pytest.fixture
+def watched_videos(db, user, add_videos):
+    videos = add_videos(30)
+    for video in videos[:10]:
+        db.add(models.VideoProgress(
+            user_id=user.id, video_id=video.id, watch_progress=60, is_bookmarked=True
+        ))
+    db.commit()
+    return videos
+
+
+def test_read_champion_pools(client, db, user, auth_headers, query_budget):
+    for i in range(5):
+        db.add(models.ChampionPool(name=f"Pool {i}", user_id=user.id, champions=[
+            models.ChampionPoolEntry(champion_id=str(j), champion_name=f"Champion {j}")
+            for j in range(3)
+        ]))
+    db.commit()
+
+    # The pools, then all their champions in one query
+    with query_budget(2, "GET /champion-pools/"):
+        response = client.get("/champion-pools/", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert [len(pool["champions"]) for pool in response.json()] == [3] * 5
+
+
+@pytest.mark.parametrize("url, budget", [
+    # Catalog version for the ETag, then the page
+    ("/videos/?limit=20", 2),
+    ("/videos/?limit=20&expand=progress,creator", 1),
+    ("/videos/search/?limit=20", 2),
+    # Plus the highlighted snippets, for the whole page at once
+    ("/videos/search/?q=midgame&limit=20", 3),
+    ("/videos/recently-watched/?limit=20", 1),
+    ("/videos/bookmarked/?limit=20", 1),
+])
+def test_video_lists(client, watched_videos, auth_headers, query_budget, url, budget):
+    with query_budget(budget, f"GET {url}"):
+        response = client.get(url, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert len(response.json()) >= 10
+
+
+def kemono_post(i):
+    return {
+        "id": str(i),
+        "title": f"Imported lesson {i}",
+        "user": "kemono-coach",
+        "service": "patreon",
+        "added": "2024-01-01T00:00:00",
+        "published": "2024-01-02T00:00:00",
+        "content": "<p>Key point</p>",
+        "file": {"path": f"/data/{i}.mp4"},
+        "tags": ["imported"],
+    }
+
+
+def test_kemono_import(client, auth_headers, query_budget):
+    posts = [kemono_post(i) for i in range(20)]
+    request = {"creator_id": "kemono-coach"}
+
+    with patch.object(KemonoService, "fetch_videos", return_value=posts):
+        # Categories, existing videos, one insert, then the creators in bulk
+        with query_budget(9, "first import"):
+            response = client.post("/videos/kemono/import", json=request, headers=auth_headers)
+        assert response.status_code == 200
+        result = response.json()
+        assert result["imported_videos"] == 20
+        assert result["creators_processed"]
+        assert all(video["creator_relation_id"] is not None for video in result["videos"])
+
+        # Everything is already there
+        with query_budget(3, "repeated import"):
+            response = client.post("/videos/kemono/import", json=request, headers=auth_headers)
+        assert response.json()["skipped_videos"] == 20
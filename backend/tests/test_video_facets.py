@@ -0,0 +1,48 @@
+from datetime import datetime
+
+from app import models
+
+
+def facets(client, headers, **params):
+    response = client.get("/videos/facets/", params=params, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_counts_are_cached(client, auth_headers, add_videos, query_budget):
+    add_videos(4)
+    first = facets(client, auth_headers)
+    assert first["total"] == 4
+    assert first["tags"] == [{"tag": "midgame", "count": 4}]
+
+    # The versions alone
+    with query_budget(1, "cached facets"):
+        assert facets(client, auth_headers) == first
+
+
+def test_progress_written_by_another_worker_is_counted(client, db, user, auth_headers, add_videos):
+    videos = add_videos(4)
+    assert facets(client, auth_headers)["watched"] == 0
+    assert facets(client, auth_headers, watched=True)["total"] == 0
+
+    # Written behind this worker's back, as another worker (or its heartbeat flush) would
+    db.add(models.VideoProgress(
+        user_id=user.id, video_id=videos[0].id, is_watched=True, last_watched=datetime.utcnow()
+    ))
+    db.commit()
+
+    assert facets(client, auth_headers)["watched"] == 1
+    assert facets(client, auth_headers, watched=True)["total"] == 1
+
+    # A heartbeat heard earlier than the latest write still counts once it completes a video
+    db.add(models.VideoProgress(
+        user_id=user.id, video_id=videos[1].id, is_watched=False, last_watched=datetime(2024, 1, 1)
+    ))
+    db.commit()
+    assert facets(client, auth_headers)["watched"] == 1
+    progress = db.get(models.VideoProgress, 2)
+    progress.is_watched = True
+    db.commit()
+
+    assert facets(client, auth_headers)["watched"] == 2
+    assert facets(client, auth_headers, watched=True)["total"] == 2
@@ -0,0 +1,66 @@
+from app.pagination import NEXT_CURSOR_HEADER
+
+
+def read_all_pages(client, url, headers):
+    """Follow the cursors of a video list, returning the pages"""
+    pages = []
+    cursor = None
+    while True:
+        params = {"cursor": cursor} if cursor else {}
+        response = client.get(url, params=params, headers=headers)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return pages
+
+
+def test_cursor_walks_every_video_once(client, auth_headers, add_videos):
+    videos = add_videos(25)
+
+    pages = read_all_pages(client, "/videos/?limit=10", auth_headers)
+
+    assert [len(page) for page in pages] == [10, 10, 5]
+    ids = [video["id"] for page in pages for video in page]
+    # Newest first by default
+    assert ids == [video.id for video in reversed(videos)]
+
+
+def test_cursor_with_ties_and_nulls(client, db, auth_headers, add_videos):
+    videos = add_videos(12)
+    # Equal sort values are ordered by id and NULLs come last
+    for video in videos[:4]:
+        video.published_date = videos[4].published_date
+    for video in videos[-3:]:
+        video.published_date = None
+    db.commit()
+
+    pages = read_all_pages(client, "/videos/?limit=5&sort_order=asc", auth_headers)
+
+    ids = [video["id"] for page in pages for video in page]
+    assert sorted(ids) == sorted(video.id for video in videos)
+    assert ids[-3:] == [video.id for video in videos[-3:]]
+
+
+def test_cursor_by_title(client, auth_headers, add_videos):
+    add_videos(7)
+
+    pages = read_all_pages(client, "/videos/?limit=3&sort_by=title&sort_order=asc", auth_headers)
+
+    titles = [video["title"] for page in pages for video in page]
+    assert titles == sorted(titles)
+    assert len(titles) == 7
+
+
+def test_cursor_for_another_sort_is_rejected(client, auth_headers, add_videos):
+    add_videos(3)
+    response = client.get("/videos/?limit=1", headers=auth_headers)
+    cursor = response.headers[NEXT_CURSOR_HEADER]
+
+    response = client.get(
+        "/videos/", params={"limit": 1, "sort_by": "title", "cursor": cursor}, headers=auth_headers
+    )
+    assert response.status_code == 400
+
+    response = client.get("/videos/", params={"cursor": "not-a-cursor"}, headers=auth_headers)
+    assert response.status_code == 400
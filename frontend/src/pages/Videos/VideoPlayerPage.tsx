@@ -696,25 +696,21 @@ const VideoPlayerPage: React.FC = () => {
       setError(null);
       
       try {
-        // Fetch video details
-        const videoResponse = await axios.get(`/videos/${videoId}`, {
+        // Fetch video details and existing progress in one request
+        const bundleResponse = await axios.get(`/videos/${videoId}/bundle`, {
           headers: { Authorization: `Bearer ${token}` }
         });
-        
-        setVideo(videoResponse.data);
-        
-        // Try to fetch existing progress
-        try {
-          const progressResponse = await axios.get(`/videos/progress/${videoId}`, {
-            headers: { Authorization: `Bearer ${token}` }
-          });
-          
-          setVideoProgress(progressResponse.data);
-          setNotes(progressResponse.data.notes || '');
-          setBookmarked(!!progressResponse.data.is_bookmarked);
-          setCompleted(!!progressResponse.data.is_completed || !!progressResponse.data.is_watched);
-          setIsCompleted(progressResponse.data.is_completed);
-        } catch (err) {
+
+        setVideo(bundleResponse.data.video);
+
+        const progress = bundleResponse.data.progress;
+        if (progress) {
+          setVideoProgress(progress);
+          setNotes(progress.notes || '');
+          setBookmarked(!!progress.is_bookmarked);
+          setCompleted(!!progress.is_completed || !!progress.is_watched);
+          setIsCompleted(progress.is_completed);
+        } else {
           // It's okay if there's no progress yet
           console.log('No existing progress found');
         }